@@ -17,8 +17,21 @@ please see
 Note: this file is for support purposes only, and is not part of your
 submission.
 """
-from algorithms import PushyPassenger, RandomAlgorithm, ShortSighted, RandomArrivals, FileArrivals
-from simulation import Simulation
+import math
+import random
+import subprocess
+import sys
+from typing import Optional
+
+import pytest
+
+from algorithms import Direction, GroupDispatch, Look, PushyPassenger, RandomAlgorithm, ShortSighted, RandomArrivals, FileArrivals, StreamingFileArrivals, BinaryFileArrivals, write_binary_trace, VectorRandomArrivals, PoissonArrivals
+from entities import CompletedPeople, HeadlessElevator, HeadlessPerson, RoundClock
+from simulation import Simulation, branch_run, load_checkpoint, sweep, _run_branches_in_turn
+from kinematics import CarKinematics
+from stats import QuantileSketch, RunningStats, TripStats
+from waiting import DOWN, UP, WaitingQueues
+from zones import BuildingLayout
 
 
 def test_random_arrival_generator_zero() -> None:
@@ -89,6 +102,112 @@ def test_file_arrival_generator() -> None:
             assert len(people) == 0
 
 
+def test_streaming_file_arrivals_match_file_arrivals() -> None:
+    """Test that reading the arrivals file as the rounds go by gives the same
+    arrivals as reading it all up front.
+    """
+    max_floor = 5
+    streaming = StreamingFileArrivals(max_floor, 'sample_arrivals.csv')
+    file_generator = FileArrivals(max_floor, 'sample_arrivals.csv')
+
+    assert streaming.next_arrival_round(0) == 1
+    for round_num in range(8):
+        expected = file_generator.generate(round_num)
+        arrivals = streaming.generate(round_num)
+        assert arrivals.keys() == expected.keys()
+        for floor, people in arrivals.items():
+            assert [(p.start, p.target) for p in people] == \
+                [(p.start, p.target) for p in expected[floor]]
+    assert streaming.next_arrival_round(8) is None
+
+
+def test_streaming_file_arrivals_reopen_after_release() -> None:
+    """Test that a streaming generator holds no open file between runs, and
+    carries on where it left off when it is asked for more arrivals.
+    """
+    max_floor = 5
+    streaming = StreamingFileArrivals(max_floor, 'sample_arrivals.csv')
+    file_generator = FileArrivals(max_floor, 'sample_arrivals.csv')
+    assert streaming._file is None
+
+    for round_num in range(8):
+        expected = file_generator.generate_floors(round_num)
+        assert streaming.generate_floors(round_num) == expected
+        streaming.release_files()
+        assert streaming._file is None
+    assert streaming.next_arrival_round(8) is None
+
+
+def test_binary_trace_matches_csv(tmp_path) -> None:
+    """Test that a CSV file converted to a binary trace replays the same
+    arrivals, and that its rounds must be in order.
+    """
+    trace = str(tmp_path / 'sample.trace')
+    assert write_binary_trace('sample_arrivals.csv', trace) == 4
+
+    binary = BinaryFileArrivals(5, trace)
+    file_generator = FileArrivals(5, 'sample_arrivals.csv')
+    for round_num in range(8):
+        assert binary.generate_floors(round_num) == \
+            file_generator.generate_floors(round_num)
+        assert binary.next_arrival_round(round_num) == \
+            file_generator.next_arrival_round(round_num)
+    assert binary.round_slice(5).tolist() == [5, 4, 2]
+    binary.close()
+
+    unordered = tmp_path / 'unordered.csv'
+    unordered.write_text('3, 1, 2\n1, 2, 1\n')
+    with pytest.raises(ValueError):
+        write_binary_trace(str(unordered), trace)
+
+
+def test_vector_random_arrivals() -> None:
+    """Test that vectorized arrivals have distinct targets and depend only on
+    the seed and the round."""
+    pytest.importorskip('numpy')
+    arrivals = VectorRandomArrivals(4, 50, seed=3, rounds_per_block=8)
+    starts, targets = arrivals.generate_rounds(5, 10)
+    assert starts.shape == targets.shape == (10, 50)
+    assert (starts != targets).all()
+    assert 1 <= starts.min() and starts.max() <= 4
+    assert 1 <= targets.min() and targets.max() <= 4
+
+    again = VectorRandomArrivals(4, 50, seed=3, rounds_per_block=8)
+    assert again.generate_floors(12) == (starts[7].tolist(),
+                                         targets[7].tolist())
+    people = again.generate(12)
+    assert sum(len(group) for group in people.values()) == 50
+    assert all(person.start == floor
+               for floor, group in people.items() for person in group)
+
+
+def test_poisson_arrivals_follow_profile() -> None:
+    """Test that Poisson arrivals follow the rate profile and the
+    origin/destination matrix."""
+    pytest.importorskip('numpy')
+    # Everyone arrives at floor 1 during the first step of the profile, and
+    # at floor 3 during the second; nobody goes to floor 2.
+    rates = [[2, 0, 0], [0, 0, 2]]
+    destinations = [[0, 0, 1], [1, 0, 1], [1, 0, 0]]
+    arrivals = PoissonArrivals(3, rates, 40, destinations,
+                               rounds_per_step=10, seed=5)
+    for round_num in range(50):
+        starts, targets = arrivals.generate_floors(round_num)
+        if round_num >= 40:
+            assert starts == []
+        elif round_num % 20 < 10:
+            assert set(starts) <= {1} and set(targets) <= {3}
+        else:
+            assert set(starts) <= {3} and set(targets) <= {1}
+
+    first = arrivals.next_arrival_round(0)
+    assert first is not None and arrivals.generate_floors(first)[0]
+    assert arrivals.next_arrival_round(40) is None
+
+    with pytest.raises(ValueError):
+        PoissonArrivals(3, [[0, 1, 0]], 10, [[0, 0, 1], [0, 1, 0], [1, 0, 0]])
+
+
 def test_random_moving_algorithm() -> None:
     """Test the random moving algorithm.
 
@@ -203,6 +322,770 @@ def test_short_sighted_moving_algorithm() -> None:
     assert results['avg_time'] == 4
 
 
+def test_headless_entities_without_visualizer() -> None:
+    """Test that a simulation that is not visualized uses headless entities.
+    """
+    config = {
+        'num_floors': 5,
+        'num_elevators': 2,
+        'elevator_capacity': 1,
+        'num_people_per_round': 2,
+        'arrival_generator': FileArrivals(5, 'sample_arrivals.csv'),
+        'moving_algorithm': PushyPassenger(),
+        'visualize': False
+    }
+    sim = Simulation(config)
+    sim.run(3)
+
+    for elevator in sim.elevators:
+        assert type(elevator) is HeadlessElevator
+        assert not hasattr(elevator, 'image')
+
+    for floor, people in sim.waiting.items():
+        for person in people:
+            assert type(person) is HeadlessPerson
+            assert not hasattr(person, 'image')
+
+
+def test_headless_import_does_not_load_pygame() -> None:
+    """Test that importing the simulation and running it headless never
+    imports Pygame.
+    """
+    code = ('import sys, algorithms, simulation\n'
+            'sim = simulation.Simulation({'
+            "'num_floors': 5, 'num_elevators': 1, 'elevator_capacity': 1, "
+            "'arrival_generator': algorithms.FileArrivals(5, 'arr.csv'), "
+            "'moving_algorithm': algorithms.ShortSighted(), "
+            "'visualize': False})\n"
+            'sim.run(5)\n'
+            "assert 'pygame' not in sys.modules\n")
+    subprocess.run([sys.executable, '-c', code], check=True)
+
+
+def test_person_sprites_share_cached_images() -> None:
+    """Test that person sprites share one image per anger level, and only
+    swap it when their anger level changes.
+    """
+    from sprite_entities import Person
+    clock = RoundClock()
+    calm, also_calm = Person(1, 2), Person(3, 1)
+    calm.arrive(clock)
+    also_calm.arrive(clock)
+    assert calm.image is also_calm.image
+
+    clock.now = 1
+    calm.update_image()
+    assert calm.image is also_calm.image
+
+    clock.now = 3
+    calm.update_image()
+    assert calm.get_anger_level() == 1
+    assert calm.image is not also_calm.image
+    assert calm.image is calm.load_image()
+
+
+def test_waiting_queues_board_in_arrival_order() -> None:
+    """Test that boarding takes people off a floor's queue first-in-first-out,
+    up to the requested number.
+    """
+    waiting = WaitingQueues(3)
+    people = [HeadlessPerson(2, 3), HeadlessPerson(2, 1), HeadlessPerson(2, 3)]
+    waiting.add(2, people)
+
+    # Each floor can still be read like a list, in the order people arrived.
+    assert waiting[2][0] is people[0]
+    assert waiting[2][1] is people[1]
+    assert waiting[2][-1] is people[2]
+    assert waiting[2][1:] == people[1:]
+    with pytest.raises(IndexError):
+        waiting[1][0]
+
+    assert waiting.board(1, 4) == []
+    assert waiting.board(2, 2) == people[:2]
+    assert list(waiting[2]) == people[2:]
+    assert waiting.board(2, 5) == people[2:]
+    assert len(waiting[2]) == 0
+
+
+def test_waiting_queues_track_occupied_floors() -> None:
+    """Test that the lowest and closest floors with people waiting follow
+    arrivals and boarding.
+    """
+    waiting = WaitingQueues(10)
+    assert waiting.lowest_floor() is None
+    assert waiting.closest_floors(5) == (None, None)
+
+    waiting.add(7, [HeadlessPerson(7, 1)])
+    waiting.add(3, [HeadlessPerson(3, 1), HeadlessPerson(3, 9)])
+    assert waiting.lowest_floor() == 3
+    assert waiting.closest_floors(5) == (3, 7)
+    assert waiting.closest_floors(7) == (3, 7)
+    assert waiting.closest_floors(8) == (7, None)
+
+    waiting.board(3, 1)
+    assert waiting.lowest_floor() == 3
+    waiting.board(3, 1)
+    assert waiting.lowest_floor() == 7
+    assert waiting.closest_floors(5) == (None, 7)
+
+
+def test_waiting_queues_split_hall_calls_by_direction() -> None:
+    """Test that each floor keeps separate queues for people going up and
+    down, and tracks the floors with a call in each direction.
+    """
+    waiting = WaitingQueues(10)
+    people = [HeadlessPerson(4, 9), HeadlessPerson(4, 1), HeadlessPerson(4, 6),
+              HeadlessPerson(8, 2)]
+    waiting.add(4, people[:3])
+    waiting.add(8, people[3:])
+    assert waiting.count(4, UP) == 2 and waiting.count(4, DOWN) == 1
+    assert waiting[4].first_direction() == UP
+    assert waiting.occupied_floors(UP) == [4]
+    assert waiting.closest_floors(6, DOWN) == (4, 8)
+
+    assert waiting.board(4, 5, DOWN) == [people[1]]
+    assert waiting.occupied_floors(DOWN) == [8]
+    assert list(waiting[4]) == [people[0], people[2]]
+    assert waiting.board(4, 1, UP) == [people[0]]
+    assert waiting.occupied_floors() == [4, 8]
+
+
+def test_elevator_only_boards_people_going_its_way(tmp_path) -> None:
+    """Test that an elevator with a passenger going up leaves people going
+    down on the floor it passes.
+    """
+    filename = str(tmp_path / 'arrivals.csv')
+    with open(filename, 'w') as arrivals:
+        arrivals.write('0, 1, 5\n1, 2, 1, 2, 4\n')
+    sim = Simulation({
+        'num_floors': 5,
+        'num_elevators': 1,
+        'elevator_capacity': 3,
+        'num_people_per_round': None,
+        'arrival_generator': FileArrivals(5, filename),
+        'moving_algorithm': PushyPassenger(),
+        'visualize': False
+    })
+    sim.run(2)
+    elevator = sim.elevators[0]
+    assert elevator.current_floor == 3
+    assert [person.target for person in elevator.passengers] == [5, 4]
+    assert [person.target for person in sim.waiting[2]] == [1]
+
+
+def test_elevator_disembark_at_target_floor() -> None:
+    """Test that disembarking at a floor removes exactly the passengers going
+    there, and keeps the boarding order of everyone else.
+    """
+    elevator = HeadlessElevator(5)
+    people = [HeadlessPerson(1, 3), HeadlessPerson(1, 4), HeadlessPerson(1, 3),
+              HeadlessPerson(1, 5)]
+    elevator.board(people)
+
+    assert elevator.disembark_at(2) == []
+    assert elevator.disembark_at(3) == [people[0], people[2]]
+    assert elevator.get_passengers() == [people[1], people[3]]
+
+    elevator.person_disembark(people[3])
+    assert elevator.disembark_at(5) == []
+    assert elevator.disembark_at(4) == [people[1]]
+    assert elevator.get_passengers() == []
+
+
+def test_person_wait_time_follows_clock() -> None:
+    """Test that a person's wait time is worked out from the clock rounds
+    they arrived and completed in.
+    """
+    clock = RoundClock()
+    clock.now = 3
+    person = HeadlessPerson(1, 5)
+    person.arrive(clock)
+    assert person.get_wait_time() == 0
+
+    clock.now = 8
+    assert person.get_wait_time() == 5
+    assert person.get_anger_level() == 2
+
+    person.complete()
+    clock.now = 20
+    assert person.get_wait_time() == 5
+    assert person.wait_time == 5
+
+    # wait adds to the wait time without moving the recorded arrival round.
+    person.wait()
+    assert person.get_wait_time() == 6
+    assert person.arrival_round == 3
+
+
+def test_completed_people_keep_only_trip_numbers() -> None:
+    """Test that completed people are recorded as numbers, not objects."""
+    clock = RoundClock()
+    people = [HeadlessPerson(1, 4), HeadlessPerson(3, 2)]
+    for person in people:
+        person.arrive(clock)
+    clock.now = 2
+    people[0].board()
+    clock.now = 4
+    people[1].board()
+    clock.now = 6
+    for person in people:
+        person.complete()
+
+    completed = CompletedPeople(keep_trips=True)
+    completed.add(people)
+    assert len(completed) == 2
+    assert list(completed.starts) == [1, 3]
+    assert list(completed.targets) == [4, 2]
+    assert completed.wait_times() == [6, 6]
+    assert list(completed.queue_times) == [2, 4]
+    assert not hasattr(people[0], '__dict__')
+
+    summary = completed.stats.summary()
+    assert summary['people_completed'] == 2
+    assert summary['avg_queue_time'] == 3
+    assert summary['max_car_time'] == 4
+    assert summary['min_car_time'] == 2
+
+    untracked = CompletedPeople()
+    untracked.add(people)
+    assert len(untracked) == 2 and len(untracked.starts) == 0
+
+
+def test_quantile_sketch_percentiles_and_merge() -> None:
+    """Test that sketch percentiles are exact for small values, close for
+    large ones, and that merged sketches match one sketch of all values."""
+    whole, first, second = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for value in range(1, 1001):
+        whole.add(value)
+        (first if value % 2 else second).add(value)
+    first.merge(second)
+    for fraction in (0.5, 0.9, 0.99, 0.999):
+        assert whole.quantile(fraction) == first.quantile(fraction)
+    assert whole.quantile(0.5) == 500
+    assert whole.quantile(0.999) == 999
+    assert whole.quantile(1) == 1000
+
+    large = QuantileSketch(exact_limit=10, relative_error=0.01)
+    for value in range(1, 100001):
+        large.add(value)
+    assert abs(large.quantile(0.9) - 90000) <= 0.01 * 90000
+    assert len(large._counts) < 1000
+
+    stats, other = RunningStats(), RunningStats()
+    stats.add(5)
+    other.add(2, count=3)
+    stats.merge(other)
+    assert (stats.count, stats.total) == (4, 11)
+    assert (stats.minimum, stats.maximum) == (2, 5)
+
+
+def test_event_engine_matches_round_engine(tmp_path) -> None:
+    """Test that the event engine, which skips idle rounds, reports the same
+    statistics as running every round.
+    """
+    trace = tmp_path / 'sparse.csv'
+    trace.write_text('2, 1, 9, 6, 2\n40, 9, 1\n41, 3, 4, 4, 3\n90, 5, 8\n')
+
+    for algorithm in [PushyPassenger, ShortSighted, GroupDispatch, Look]:
+        for filename in ['sample_arrivals.csv', 'arr.csv', str(trace)]:
+            results = []
+            for engine in ['round', 'event']:
+                config = {
+                    'num_floors': 9,
+                    'num_elevators': 2,
+                    'elevator_capacity': 2,
+                    'num_people_per_round': None,
+                    'arrival_generator': FileArrivals(9, filename),
+                    'moving_algorithm': algorithm(),
+                    'visualize': False,
+                    'engine': engine
+                }
+                results.append(Simulation(config).run(120))
+            assert results[0] == results[1]
+
+
+def test_batch_simulation_matches_simulation() -> None:
+    """Test that a batch of runs with different configurations reports the
+    same statistics as running each configuration on its own.
+    """
+    batch = pytest.importorskip('batch')
+
+    def make_configs() -> list:
+        configs = []
+        for algorithm in [PushyPassenger, ShortSighted]:
+            for filename in ['sample_arrivals.csv', 'arr.csv']:
+                for num_elevators, capacity in [(1, 1), (2, 1), (3, 4)]:
+                    configs.append({
+                        'num_floors': 5,
+                        'num_elevators': num_elevators,
+                        'elevator_capacity': capacity,
+                        'num_people_per_round': None,
+                        'arrival_generator': FileArrivals(5, filename),
+                        'moving_algorithm': algorithm(),
+                        'visualize': False
+                    })
+        return configs
+
+    expected = [Simulation(config).run(12) for config in make_configs()]
+    assert batch.BatchSimulation(make_configs()).run(12) == expected
+
+    with pytest.raises(ValueError):
+        config = make_configs()[0]
+        config['moving_algorithm'] = RandomAlgorithm()
+        batch.BatchSimulation([config])
+
+
+def test_car_kinematics_travel_time() -> None:
+    """Test that short trips never reach top speed, and longer ones cruise at
+    it between speeding up and slowing down."""
+    car = CarKinematics(floor_height=2.0, max_speed=2.0, acceleration=1.0)
+    assert car.travel_time(0) == 0
+    assert car.travel_time(1) == pytest.approx(2 * 2 ** 0.5)
+    assert car.travel_time(2) == pytest.approx(4.0)
+    assert car.travel_time(5) == pytest.approx(7.0)
+    assert CarKinematics(2.0, 2.0, math.inf).travel_time(5) == 5.0
+
+
+def test_kinematic_elevator_stops_and_travels(tmp_path) -> None:
+    """Test that an elevator waits at a stop while its doors open and people
+    board, and that a kinematic model with no stops and one floor per round
+    gives the same results as the plain model."""
+    filename = str(tmp_path / 'arrivals.csv')
+    with open(filename, 'w') as arrivals:
+        arrivals.write('0, 1, 3\n')
+
+    def make(kinematics: Optional[CarKinematics]) -> Simulation:
+        config = {
+            'num_floors': 5,
+            'num_elevators': 1,
+            'elevator_capacity': 2,
+            'num_people_per_round': None,
+            'arrival_generator': FileArrivals(5, filename),
+            'moving_algorithm': PushyPassenger(),
+            'visualize': False,
+            'kinematics': kinematics
+        }
+        return Simulation(config)
+
+    assert make(None).run(10)['max_time'] == 2
+    assert make(CarKinematics(1.0, 1.0, math.inf, 0, 0)).run(10) == \
+        make(None).run(10)
+
+    # The doors take 2 seconds and boarding 1, then the elevator goes up two
+    # floors in one run at 1 floor per second.
+    kinematics = CarKinematics(3.0, 3.0, math.inf, door_time=2,
+                               board_time=1)
+    sim = make(kinematics)
+    assert sim.run(10)['max_time'] == 5
+
+    sim = make(kinematics)
+    sim.run(2)
+    snapshot = sim.snapshot()
+    restored = make(kinematics)
+    restored.restore(snapshot)
+    assert restored.run(10)['max_time'] == 5
+
+
+def test_kinematic_stateful_algorithms_with_busy_elevators() -> None:
+    """Test that algorithms that keep state for each elevator keep working
+    while some elevators are busy stopping or travelling, and that a
+    simulation restored part of the way through finishes the same way."""
+    def make(algorithm) -> Simulation:
+        config = {
+            'num_floors': 10,
+            'num_elevators': 3,
+            'elevator_capacity': 4,
+            'num_people_per_round': 2,
+            'arrival_generator': RandomArrivals(10, 2),
+            'moving_algorithm': algorithm,
+            'visualize': False,
+            'kinematics': CarKinematics(door_time=2, board_time=1)
+        }
+        return Simulation(config)
+
+    for algorithm_type in [GroupDispatch, Look]:
+        random.seed(5)
+        sim = make(algorithm_type())
+        some_busy = False
+        for round_num in range(1, 101):
+            sim.run(round_num)
+            some_busy = some_busy or not all(sim._motion.ready)
+        assert some_busy
+        snapshot = sim.snapshot()
+        stats = sim.run(200)
+        assert stats['people_completed'] > 0
+
+        restored = make(algorithm_type())
+        restored.restore(snapshot)
+        assert restored.run(200) == stats
+
+
+def test_building_layout_routes_through_sky_lobbies() -> None:
+    """Test that routes take the fewest legs, changing banks at floors both
+    banks serve, and that a building with an unreachable floor is refused."""
+    served = [range(1, 10), range(1, 10), [1, 10], range(10, 16)]
+    layout = BuildingLayout(15, served)
+    assert layout.banks == [[0, 1], [2], [3]]
+    assert layout.bank_of == [0, 0, 1, 2]
+    assert layout.serves[2][10] and not layout.serves[2][5]
+
+    assert layout.route(3, 5) == (5, 0)
+    assert layout.route(3, 14) == (1, 0)
+    assert layout.route(1, 14) == (10, 1)
+    assert layout.route(10, 14) == (14, 2)
+    assert layout.route(14, 3) == (10, 2)
+
+    with pytest.raises(ValueError):
+        BuildingLayout(15, [range(1, 7), range(8, 16)])
+
+
+def test_zoned_trip_transfers_at_sky_lobby(tmp_path) -> None:
+    """Test that a person whose floors no elevator serves together rides to
+    the sky lobby, waits there for the other bank, and is counted once."""
+    filename = str(tmp_path / 'arrivals.csv')
+    with open(filename, 'w') as arrivals:
+        arrivals.write('0, 2, 10, 7, 12\n')
+
+    def make() -> Simulation:
+        config = {
+            'num_floors': 12,
+            'num_elevators': 2,
+            'elevator_capacity': 2,
+            'num_people_per_round': None,
+            'arrival_generator': FileArrivals(12, filename),
+            'moving_algorithm': ShortSighted(),
+            'visualize': False,
+            'served_floors': [range(1, 7), range(6, 13)]
+        }
+        return Simulation(config)
+
+    # The elevators start at the lowest floors of their zones. The low one
+    # takes the first person to floor 6 by round 5, while the high one takes
+    # the second person up from floor 7 and only gets back down to floor 6
+    # in round 12.
+    sim = make()
+    sim.run(7)
+    waiting = [person for _, people in sim.waiting.items()
+               for person in people]
+    assert [(person.target, person.final_target) for person in waiting] == \
+        [(10, 10)]
+    assert sim.waiting.banks[1].count(6, UP) == 1
+    snapshot = sim.snapshot()
+
+    # The first person waits a round for the low elevator, and another
+    # seven at the sky lobby, which count as queue time rather than time in
+    # an elevator.
+    stats = sim.run(20)
+    assert stats['people_completed'] == 2
+    assert stats['max_time'] == 16
+    assert stats['max_queue_time'] == 8
+    assert stats['max_car_time'] == 8
+
+    restored = make()
+    restored.restore(snapshot)
+    assert restored.run(20) == stats
+
+    with pytest.raises(ValueError):
+        config = {'num_floors': 5, 'num_elevators': 2,
+                  'elevator_capacity': 1,
+                  'arrival_generator': FileArrivals(5, filename),
+                  'moving_algorithm': ShortSighted(), 'visualize': False,
+                  'served_floors': [range(1, 6)]}
+        Simulation(config)
+
+
+def test_zoned_elevators_stay_within_their_floors() -> None:
+    """Test that an algorithm that moves elevators at random never takes one
+    beyond the floors it serves."""
+    random.seed(3)
+    config = {
+        'num_floors': 8,
+        'num_elevators': 2,
+        'elevator_capacity': 2,
+        'num_people_per_round': 1,
+        'arrival_generator': RandomArrivals(8, 1),
+        'moving_algorithm': RandomAlgorithm(),
+        'visualize': False,
+        'served_floors': [range(1, 4), range(3, 9)]
+    }
+    sim = Simulation(config)
+    low, high = sim.elevators
+    assert (low.current_floor, high.current_floor) == (1, 3)
+    for round_num in range(1, 100):
+        sim.run(round_num)
+        assert 1 <= low.current_floor <= 3
+        assert 3 <= high.current_floor <= 8
+
+
+def test_profiled_run_reports_stages() -> None:
+    """Test that a profiled run reports every stage once per round, and the
+    same statistics as an unprofiled run."""
+    def run(profile: bool) -> dict:
+        config = {
+            'num_floors': 5,
+            'num_elevators': 2,
+            'elevator_capacity': 2,
+            'num_people_per_round': 0,
+            'arrival_generator': FileArrivals(5, 'sample_arrivals.csv'),
+            'moving_algorithm': ShortSighted(),
+            'visualize': False,
+            'profile': profile
+        }
+        return Simulation(config).run(12)
+
+    stats = run(True)
+    profile = stats.pop('profile')
+    assert stats == run(False)
+    for stage in ['generate_arrivals', 'handle_leaving', 'handle_boarding',
+                  'move_elevators', 'ShortSighted.move_elevators',
+                  'visualizer.render_header', 'visualizer.wait']:
+        assert profile[stage]['calls'] == 12
+        assert profile[stage]['seconds'] >= 0
+    assert 'profile' not in run(False)
+
+
+def test_restored_snapshot_gives_same_results(tmp_path) -> None:
+    """Test that a simulation restored from a checkpoint finishes with the
+    same statistics as one that was never interrupted."""
+    def config(generator: str, **extra) -> dict:
+        if generator == 'random':
+            arrivals = RandomArrivals(6, 2)
+        else:
+            arrivals = StreamingFileArrivals(6, 'sample_arrivals.csv')
+        config = {
+            'num_floors': 6,
+            'num_elevators': 2,
+            'elevator_capacity': 2,
+            'num_people_per_round': 2,
+            'arrival_generator': arrivals,
+            'moving_algorithm': RandomAlgorithm(),
+            'visualize': False
+        }
+        config.update(extra)
+        return config
+
+    checkpoint = str(tmp_path / 'checkpoint.pickle')
+    for generator in ['random', 'streaming']:
+        random.seed(11)
+        expected = Simulation(config(generator)).run(60)
+
+        random.seed(11)
+        Simulation(config(generator, checkpoint_file=checkpoint,
+                          checkpoint_every=20)).run(30)
+        random.seed(0)
+        resumed = Simulation(config(generator))
+        resumed.restore(load_checkpoint(checkpoint))
+        assert resumed.num_round == 20
+        assert resumed.run(60) == expected
+
+
+def test_run_carries_on_until_round() -> None:
+    """Test that running a simulation again carries on from the round it
+    stopped in, and that it cannot be run until a round it has passed."""
+    def make() -> Simulation:
+        config = {
+            'num_floors': 6,
+            'num_elevators': 2,
+            'elevator_capacity': 2,
+            'num_people_per_round': None,
+            'arrival_generator': StreamingFileArrivals(
+                6, 'sample_arrivals.csv'),
+            'moving_algorithm': ShortSighted(),
+            'visualize': False
+        }
+        return Simulation(config)
+
+    expected = make().run(30)
+    sim = make()
+    sim.run(10)
+    assert sim.num_round == 10
+    assert sim.run(30) == expected
+    with pytest.raises(ValueError):
+        sim.run(30)
+    with pytest.raises(ValueError):
+        sim.run(5)
+
+
+def test_branches_continue_from_shared_warm_up(tmp_path) -> None:
+    """Test that each branch gives the same statistics as a simulation that
+    switches to its moving algorithm after the warm-up, and that branches
+    leave the checkpoint of the warm-up alone."""
+    checkpoint = str(tmp_path / 'checkpoint.pickle')
+
+    def warmed_up() -> Simulation:
+        random.seed(5)
+        simulation = Simulation({
+            'num_floors': 6,
+            'num_elevators': 2,
+            'elevator_capacity': 3,
+            'num_people_per_round': 2,
+            'arrival_generator': RandomArrivals(6, 2),
+            'moving_algorithm': PushyPassenger(),
+            'visualize': False,
+            'checkpoint_file': checkpoint,
+            'checkpoint_every': 5
+        })
+        simulation.run(25)
+        return simulation
+
+    algorithms = [ShortSighted(), RandomAlgorithm(), PushyPassenger()]
+    expected = []
+    for algorithm in algorithms:
+        simulation = warmed_up()
+        simulation.set_moving_algorithm(algorithm)
+        expected.append(simulation.run(60))
+
+    base = warmed_up()
+    assert branch_run(base, algorithms, 60, processes=2) == expected
+    assert base.num_round == 25
+    assert _run_branches_in_turn(base, algorithms, 60) == expected
+    assert base.num_round == 25
+    assert load_checkpoint(checkpoint)['num_round'] == 25
+    assert base._checkpoint_file == checkpoint
+
+
+def test_group_dispatch_sends_one_elevator_per_floor() -> None:
+    """Test that GroupDispatch sends only the closest elevator to each hall
+    call, and keeps that assignment."""
+    elevators = [HeadlessElevator(2) for _ in range(3)]
+    elevators[1].set_current_floor(2)
+    elevators[2].set_current_floor(5)
+    waiting = {floor: [] for floor in range(1, 9)}
+    waiting[6] = [HeadlessPerson(6, 1)]
+    waiting[4] = [HeadlessPerson(4, 8)]
+    algorithm = GroupDispatch()
+
+    # Elevator 1 (on floor 3) goes up to floor 4 and elevator 2 waits on
+    # floor 6, so elevator 0 is left without a floor to go to.
+    directions = algorithm.move_elevators(elevators, waiting, 8)
+    assert directions == [Direction.STAY, Direction.UP, Direction.STAY]
+    assert algorithm.get_state() == {(4, 1): 1, (6, -1): 2}
+
+    copy = GroupDispatch()
+    copy.set_state(algorithm.get_state())
+    assert copy.move_elevators(elevators, waiting, 8) == directions
+
+    # Once nobody is waiting, the assignments are dropped.
+    waiting[4], waiting[6] = [], []
+    directions = algorithm.move_elevators(elevators, waiting, 8)
+    assert directions == [Direction.STAY] * 3
+    assert algorithm.get_state() == {}
+
+
+def test_group_dispatch_reassigns_calls_when_a_car_turns_away() -> None:
+    """Test that GroupDispatch moves a hall call to another elevator once
+    the elevator it was assigned to sets off the other way."""
+    elevators = [HeadlessElevator(2) for _ in range(2)]
+    elevators[0].set_current_floor(3)
+    elevators[1].set_current_floor(8)
+    waiting = {floor: [] for floor in range(1, 11)}
+    waiting[5] = [HeadlessPerson(5, 1)]
+    algorithm = GroupDispatch()
+    # Elevator 0 (on floor 4) is closer than elevator 1 (on floor 9).
+    assert algorithm.move_elevators(elevators, waiting, 10) == \
+        [Direction.UP, Direction.STAY]
+    assert algorithm.get_state() == {(5, -1): 0}
+
+    # Elevator 0 picks up someone going down to floor 1, so it would only
+    # reach floor 5 after going down there and back.
+    elevators[0].board([HeadlessPerson(4, 1)])
+    assert algorithm.move_elevators(elevators, waiting, 10) == \
+        [Direction.DOWN, Direction.DOWN]
+    assert algorithm.get_state() == {(5, -1): 1}
+
+
+def test_look_keeps_direction_until_no_stops_ahead() -> None:
+    """Test that Look keeps an elevator going the same way while it has stops
+    ahead, even when a closer stop is behind it."""
+    elevator = HeadlessElevator(2)
+    elevator.set_current_floor(3)
+    waiting = {floor: [] for floor in range(1, 9)}
+    waiting[7] = [HeadlessPerson(7, 1)]
+    algorithm = Look()
+    assert algorithm.move_elevators([elevator], waiting, 8) == [Direction.UP]
+
+    # Someone closer below turns up, but the elevator is going up.
+    elevator.set_current_floor(1)
+    waiting[3] = [HeadlessPerson(3, 8)]
+    assert algorithm.move_elevators([elevator], waiting, 8) == [Direction.UP]
+    assert ShortSighted().move_elevators([elevator], waiting, 8) == \
+        [Direction.DOWN]
+
+    # With nobody left above, it turns around.
+    waiting[7] = []
+    assert algorithm.move_elevators([elevator], waiting, 8) == [Direction.DOWN]
+    waiting[3] = []
+    assert algorithm.move_elevators([elevator], waiting, 8) == [Direction.STAY]
+
+
+def test_look_turns_around_when_nothing_is_left_ahead() -> None:
+    """Test that Look turns an elevator around exactly when it has no stops
+    left ahead, or when it has just taken on people going the other way."""
+    elevator = HeadlessElevator(4)
+    elevator.set_current_floor(4)
+    elevator.board([HeadlessPerson(5, 8)])
+    waiting = {floor: [] for floor in range(1, 11)}
+    waiting[2] = [HeadlessPerson(2, 9)]
+    waiting[9] = [HeadlessPerson(9, 1)]
+    algorithm = Look()
+
+    # Going up to floor 8, it does not turn for the closer stop on floor 2.
+    for _ in range(3):
+        assert algorithm.move_elevators([elevator], waiting, 10) == \
+            [Direction.UP]
+        elevator.set_current_floor(1)
+    assert elevator.current_floor == 8
+    elevator.disembark_at(8)
+
+    # Empty on floor 8, it carries on up to the person on floor 9, and only
+    # turns around once nobody is left above it.
+    assert algorithm.move_elevators([elevator], waiting, 10) == [Direction.UP]
+    waiting[9] = []
+    assert algorithm.move_elevators([elevator], waiting, 10) == \
+        [Direction.DOWN]
+
+    # Sweeping up again, it takes on someone going down, and turns around
+    # for them even though someone is still waiting above.
+    algorithm.set_state([Direction.UP.value])
+    waiting[9] = [HeadlessPerson(9, 10)]
+    elevator.board([HeadlessPerson(8, 3)])
+    assert algorithm.move_elevators([elevator], waiting, 10) == \
+        [Direction.DOWN]
+
+
+def test_sweep_covers_grid() -> None:
+    """Test that a sweep yields one row for every combination in the grid,
+    with the same statistics every time it is run.
+    """
+    grid = {
+        'num_elevators': [1, 2],
+        'moving_algorithm': ['PushyPassenger', 'ShortSighted'],
+        'seed': [3]
+    }
+    rows = list(sweep(grid, 20, processes=2))
+    assert len(rows) == 4
+    assert {(row['num_elevators'], row['moving_algorithm'])
+            for row in rows} == {(1, 'PushyPassenger'), (1, 'ShortSighted'),
+                                 (2, 'PushyPassenger'), (2, 'ShortSighted')}
+    for row in rows:
+        assert row['num_iterations'] == 20
+        assert row['total_people'] == 40
+
+    def key(row: dict) -> tuple:
+        return row['num_elevators'], row['moving_algorithm']
+
+    def figures(rows: list) -> list:
+        return [{column: value for column, value in row.items()
+                 if column != 'trip_stats'} for row in sorted(rows, key=key)]
+    assert figures(rows) == figures(sweep(grid, 20, processes=1))
+
+    merged = TripStats()
+    for row in rows:
+        merged.merge(row['trip_stats'])
+    assert merged.summary()['people_completed'] == sum(
+        row['people_completed'] for row in rows)
+
+
 if __name__ == '__main__':
     import pytest
     pytest.main(['a1_sample_test.py'])
@@ -17,12 +17,17 @@ See the 'Arrival generation algorithms' and 'Elevator moving algorithms'
 sections of the assignment handout for a complete description of each algorithm
 you are expected to implement in this file.
 """
+from array import array
+from bisect import bisect_left, insort
 import csv
 from enum import Enum
+import mmap
 import random
-from typing import Dict, List, Optional
+from typing import (Any, Dict, Iterable, List, Optional, Sequence, TextIO,
+                    Tuple, Type)
 
-from entities import Person, Elevator
+from entities import HeadlessElevator, HeadlessPerson
+from waiting import WaitingQueues
 
 
 ###############################################################################
@@ -37,6 +42,8 @@ class ArrivalGenerator:
                beyond this floor.
     num_people: The number of people to generate, or None if this is left
                 up to the algorithm itself.
+    person_type: The class used to create new arrivals. The simulation sets
+                 this to the sprite-backed Person when it is visualized.
 
     === Representation Invariants ===
     max_floor >= 2
@@ -44,6 +51,7 @@ class ArrivalGenerator:
     """
     max_floor: int
     num_people: Optional[int]
+    person_type: Type[HeadlessPerson]
 
     def __init__(self, max_floor: int, num_people: Optional[int]) -> None:
         """Initialize a new ArrivalGenerator.
@@ -54,8 +62,9 @@ class ArrivalGenerator:
         """
         self.max_floor = max_floor
         self.num_people = num_people
+        self.person_type = HeadlessPerson
 
-    def generate(self, round_num: int) -> Dict[int, List[Person]]:
+    def generate(self, round_num: int) -> Dict[int, List[HeadlessPerson]]:
         """Return the new arrivals for the simulation at the given round.
 
         The returned dictionary maps floor number to the people who
@@ -65,6 +74,69 @@ class ArrivalGenerator:
         """
         raise NotImplementedError
 
+    def generate_floors(self, round_num: int) -> Tuple[List[int], List[int]]:
+        """Return the start floors and the target floors of the new arrivals
+        at the given round, as two lists whose i-th entries belong to the same
+        person.
+
+        People who start on the same floor are listed in the order they
+        arrive. By default the floors are read off the people returned by
+        generate; subclasses can override this to avoid creating them.
+        """
+        starts, targets = [], []
+        for people in self.generate(round_num).values():
+            for person in people:
+                starts.append(person.start)
+                targets.append(person.target)
+        return starts, targets
+
+    def next_arrival_round(self, round_num: int) -> Optional[int]:
+        """Return the first round at or after <round_num> in which people may
+        arrive, or None if nobody arrives from <round_num> on.
+
+        The simulation uses this to skip rounds in which nothing happens. By
+        default every round may have arrivals.
+        """
+        return round_num
+
+    def get_state(self) -> Any:
+        """Return the state this generator needs to carry on from the current
+        round, as plain data that can be pickled, for a simulation snapshot.
+
+        Randomness drawn from the random module is saved by the simulation
+        itself. By default a generator has no other state, so this returns
+        None.
+        """
+        return None
+
+    def set_state(self, state: Any) -> None:
+        """Restore a state returned by get_state, possibly of another
+        generator built with the same arguments.
+        """
+
+    def release_files(self) -> None:
+        """Close any file this generator keeps open between rounds. A
+        generator that does so opens the file again if it is asked for more
+        arrivals.
+
+        The simulation calls this whenever a run ends. By default a generator
+        keeps no file open, so this does nothing.
+        """
+
+    def _people_by_floor(self, pairs: Iterable[Sequence[int]]
+                         ) -> Dict[int, List[HeadlessPerson]]:
+        """Return new people for the (start, target) floor pairs in <pairs>,
+        in a dictionary mapping every floor to the people starting there.
+        """
+        floor_to_people = {}
+        for i in range(1, self.max_floor + 1):
+            floor_to_people[i] = []
+
+        for start, target in pairs:
+            floor_to_people[start].append(self.person_type(start, target))
+
+        return floor_to_people
+
 
 class RandomArrivals(ArrivalGenerator):
     """Generate a fixed number of random people each round.
@@ -78,7 +150,7 @@ class RandomArrivals(ArrivalGenerator):
     Hint: look up the 'sample' function from random.
     """
 
-    def generate(self, round_num: int) -> Dict[int, List[Person]]:
+    def generate(self, round_num: int) -> Dict[int, List[HeadlessPerson]]:
         """Return the new arrivals for the simulation at the given round.
         The starting floor and target floor of the new arrivals are random.
 
@@ -98,7 +170,7 @@ class RandomArrivals(ArrivalGenerator):
                 while start_floor == target_floor:
                     target_floor = random.randint(1, self.max_floor)
 
-                new_person = Person(start_floor, target_floor)
+                new_person = self.person_type(start_floor, target_floor)
                 list_of_people.append(new_person)
 
             for person in list_of_people:
@@ -106,6 +178,287 @@ class RandomArrivals(ArrivalGenerator):
 
         return floor_to_people
 
+    def next_arrival_round(self, round_num: int) -> Optional[int]:
+        """Return the first round at or after <round_num> in which people may
+        arrive, or None if nobody arrives from <round_num> on.
+        """
+        return round_num if self.num_people else None
+
+
+class VectorRandomArrivals(ArrivalGenerator):
+    """Generate a fixed number of random people each round, drawing the floors
+    for many rounds at once with NumPy.
+
+    Like RandomArrivals, every start floor is equally likely, and every target
+    floor other than the start floor is equally likely. The target is drawn
+    without retrying: it is the start floor moved up by a random 1 to
+    max_floor - 1 floors, wrapping around past the top floor.
+
+    Floors are drawn in blocks of rounds, and each block has its own random
+    generator seeded from the seed and the block number, so the arrivals at
+    a round depend only on the seed and the round, not on which rounds were
+    asked for before. This class needs NumPy.
+
+    === Attributes ===
+    seed: the seed that all of the arrivals follow from
+    rounds_per_block: the number of rounds whose floors are drawn together
+
+    === Private Attributes ===
+    _block: the number of the block whose floors are in _starts and
+            _targets, or None if no block has been drawn
+    _starts: the start floors drawn for _block, one row per round
+    _targets: the target floors drawn for _block, one row per round
+
+    === Representation Invariants ===
+    rounds_per_block >= 1
+    """
+    seed: int
+    rounds_per_block: int
+    _block: Optional[int]
+    _starts: Any
+    _targets: Any
+
+    def __init__(self, max_floor: int, num_people: Optional[int],
+                 seed: Optional[int] = None,
+                 rounds_per_block: int = 256) -> None:
+        """Initialize a new VectorRandomArrivals algorithm.
+
+        If <seed> is None, a random seed is picked, and can be read back from
+        the seed attribute to repeat the same arrivals.
+
+        Preconditions:
+            max_floor >= 2
+            num_people is None or num_people >= 0
+            rounds_per_block >= 1
+        """
+        import numpy
+        ArrivalGenerator.__init__(self, max_floor, num_people)
+        if seed is None:
+            seed = numpy.random.SeedSequence().entropy
+        self.seed = seed
+        self.rounds_per_block = rounds_per_block
+        self._block = None
+        self._starts = None
+        self._targets = None
+
+    def generate(self, round_num: int) -> Dict[int, List[HeadlessPerson]]:
+        """Return the new arrivals for the simulation at the given round.
+
+        The returned dictionary maps floor number to the people who arrived
+        starting at that floor. Floors where nobody arrived are left out.
+        """
+        floor_to_people = {}
+        starts, targets = self.generate_floors(round_num)
+        for start, target in zip(starts, targets):
+            new_person = self.person_type(start, target)
+            floor_to_people.setdefault(start, []).append(new_person)
+        return floor_to_people
+
+    def generate_floors(self, round_num: int) -> Tuple[List[int], List[int]]:
+        """Return the start floors and the target floors of the new arrivals
+        at the given round.
+        """
+        starts, targets = self.generate_rounds(round_num, 1)
+        return starts[0].tolist(), targets[0].tolist()
+
+    def generate_rounds(self, first_round: int, num_rounds: int
+                        ) -> Tuple[Any, Any]:
+        """Return the start floors and the target floors of the arrivals at
+        the <num_rounds> rounds starting from <first_round>, as two NumPy
+        arrays with one row per round and one column per person.
+
+        Precondition: first_round >= 0 and num_rounds >= 0
+        """
+        import numpy
+        if not self.num_people:
+            empty = numpy.zeros((num_rounds, 0), dtype=numpy.int64)
+            return empty, empty
+
+        starts, targets = [], []
+        round_num, last_round = first_round, first_round + num_rounds
+        while round_num < last_round:
+            block, offset = divmod(round_num, self.rounds_per_block)
+            count = min(self.rounds_per_block - offset, last_round - round_num)
+            self._draw_block(block)
+            starts.append(self._starts[offset:offset + count])
+            targets.append(self._targets[offset:offset + count])
+            round_num += count
+
+        if len(starts) == 1:
+            return starts[0], targets[0]
+        return numpy.concatenate(starts), numpy.concatenate(targets)
+
+    def next_arrival_round(self, round_num: int) -> Optional[int]:
+        """Return the first round at or after <round_num> in which people may
+        arrive, or None if nobody arrives from <round_num> on.
+        """
+        return round_num if self.num_people else None
+
+    def _draw_block(self, block: int) -> None:
+        """Draw the floors for every round of the given block, unless they
+        have already been drawn.
+        """
+        import numpy
+        if block == self._block:
+            return
+
+        generator = numpy.random.default_rng([self.seed, block])
+        shape = (self.rounds_per_block, self.num_people)
+        self._starts = generator.integers(1, self.max_floor + 1, size=shape)
+        shift = generator.integers(1, self.max_floor, size=shape)
+        self._targets = (self._starts - 1 + shift) % self.max_floor + 1
+        self._block = block
+
+
+class PoissonArrivals(ArrivalGenerator):
+    """Generate arrivals from per-floor Poisson rates that change over the
+    day, with the target floors drawn from an origin/destination matrix.
+
+    The rate profile is a sequence of rows, one for each step of the day, with
+    one rate for each floor: rates[i][floor - 1] is the expected number of
+    people arriving at <floor> in each round of step i. Each step lasts
+    rounds_per_step rounds, and the profile starts over once it runs out, so a
+    profile for one day repeats every day. For example, an up-peak profile
+    has high rates on floor 1 in its first steps.
+
+    destinations[start - 1][target - 1] is the weight of <target> among the
+    target floors of people starting at <start>. Weights only need to be
+    relative to the others in the same row, and the weight of the start floor
+    itself is ignored. If no matrix is given, every other floor is equally
+    likely.
+
+    The whole schedule, up to num_rounds, is drawn when the generator is
+    created, so generate only looks up the arrivals of a round. This class
+    needs NumPy.
+
+    === Attributes ===
+    num_rounds: the number of rounds the schedule covers; nobody arrives at
+                or after this round
+    seed: the seed that the schedule follows from
+
+    === Private Attributes ===
+    _starts: the start floors of everyone in the schedule, ordered by round
+             and then by start floor
+    _targets: the target floors of everyone in the schedule, in the same
+              order as _starts
+    _offsets: _offsets[r] is the index in _starts of the first person
+              arriving at round r, and _offsets[num_rounds] is the number of
+              people in the schedule
+    _busy_rounds: the rounds in which someone arrives, in increasing order
+
+    === Representation Invariants ===
+    len(_offsets) == num_rounds + 1
+    _starts[i] != _targets[i] for every i
+    """
+    num_rounds: int
+    seed: int
+    _starts: List[int]
+    _targets: List[int]
+    _offsets: List[int]
+    _busy_rounds: List[int]
+
+    def __init__(self, max_floor: int, rates: Sequence[Sequence[float]],
+                 num_rounds: int,
+                 destinations: Optional[Sequence[Sequence[float]]] = None,
+                 rounds_per_step: int = 1,
+                 seed: Optional[int] = None) -> None:
+        """Initialize a new PoissonArrivals algorithm, and draw its schedule
+        for rounds 0 to <num_rounds> - 1.
+
+        The num_people attribute of every PoissonArrivals instance is set to
+        None, since the number of arrivals is random. If <seed> is None, a
+        random seed is picked, and can be read back from the seed attribute to
+        repeat the same schedule.
+
+        Raise ValueError if a rate is negative, or if a floor with a positive
+        rate has no target floor with a positive weight.
+
+        Preconditions:
+            max_floor >= 2
+            rates is not empty, and each of its rows has max_floor rates
+            destinations is None, or has max_floor rows of max_floor weights
+            num_rounds >= 0
+            rounds_per_step >= 1
+        """
+        import numpy
+        ArrivalGenerator.__init__(self, max_floor, None)
+        if seed is None:
+            seed = numpy.random.SeedSequence().entropy
+        self.num_rounds = num_rounds
+        self.seed = seed
+
+        rates = numpy.asarray(rates, dtype=float)
+        if (rates < 0).any():
+            raise ValueError('arrival rates must not be negative')
+        if destinations is None:
+            weights = numpy.ones((max_floor, max_floor))
+        else:
+            weights = numpy.array(destinations, dtype=float)
+        numpy.fill_diagonal(weights, 0)
+        cumulative = numpy.cumsum(weights, axis=1)
+        no_target = (rates.sum(axis=0) > 0) & (cumulative[:, -1] <= 0)
+        if no_target.any():
+            raise ValueError(f'floor {no_target.argmax() + 1} has arrivals '
+                             f'but no target floor')
+
+        # The rate of every floor at every round, then the number of people
+        # arriving there.
+        step = numpy.arange(num_rounds) // rounds_per_step % len(rates)
+        generator = numpy.random.default_rng(seed)
+        counts = generator.poisson(rates[step])
+
+        starts = numpy.repeat(numpy.tile(numpy.arange(1, max_floor + 1),
+                                         num_rounds), counts.ravel())
+        # Draw the targets one start floor at a time, visiting the people
+        # grouped by start floor.
+        targets = numpy.empty_like(starts)
+        draws = generator.random(len(starts))
+        by_start = numpy.argsort(starts, kind='stable')
+        ends = numpy.cumsum(counts.sum(axis=0)).tolist()
+        first = 0
+        for floor, last in enumerate(ends, 1):
+            mine = by_start[first:last]
+            row = cumulative[floor - 1]
+            targets[mine] = numpy.searchsorted(
+                row, draws[mine] * row[-1], side='right') + 1
+            first = last
+
+        offsets = numpy.zeros(num_rounds + 1, dtype=numpy.int64)
+        numpy.cumsum(counts.sum(axis=1), out=offsets[1:])
+        self._starts = starts.tolist()
+        self._targets = targets.tolist()
+        self._offsets = offsets.tolist()
+        self._busy_rounds = numpy.flatnonzero(counts.any(axis=1)).tolist()
+
+    def generate(self, round_num: int) -> Dict[int, List[HeadlessPerson]]:
+        """Return the new arrivals for the simulation at the given round.
+
+        The returned dictionary maps floor number to the people who arrived
+        starting at that floor. Floors where nobody arrived are left out.
+        """
+        floor_to_people = {}
+        starts, targets = self.generate_floors(round_num)
+        for start, target in zip(starts, targets):
+            new_person = self.person_type(start, target)
+            floor_to_people.setdefault(start, []).append(new_person)
+        return floor_to_people
+
+    def generate_floors(self, round_num: int) -> Tuple[List[int], List[int]]:
+        """Return the start floors and the target floors of the new arrivals
+        at the given round.
+        """
+        if not 0 <= round_num < self.num_rounds:
+            return [], []
+        first, last = self._offsets[round_num], self._offsets[round_num + 1]
+        return self._starts[first:last], self._targets[first:last]
+
+    def next_arrival_round(self, round_num: int) -> Optional[int]:
+        """Return the first round at or after <round_num> in which people
+        arrive according to the schedule, or None if there is no such round.
+        """
+        i = bisect_left(self._busy_rounds, round_num)
+        return self._busy_rounds[i] if i < len(self._busy_rounds) else None
+
 
 class FileArrivals(ArrivalGenerator):
     """Generate arrivals from a CSV file.
@@ -113,8 +466,11 @@ class FileArrivals(ArrivalGenerator):
     round_to_people:
         Stores the starting floor and target floor of the arrivals
         for a given round number.
+    _rounds:
+        The keys of round_to_people, in increasing order.
     """
     round_to_people: Dict[int, List[List[int]]]
+    _rounds: List[int]
 
     def __init__(self, max_floor: int, filename: str) -> None:
         """Initialize a new FileArrivals algorithm from the given file.
@@ -128,43 +484,330 @@ class FileArrivals(ArrivalGenerator):
         """
         ArrivalGenerator.__init__(self, max_floor, None)
 
-        # We've provided some of the "reading from csv files" boilerplate code
-        # for you to help you get started.
+        self.round_to_people = {}
         with open(filename) as csvfile:
-            reader = csv.reader(csvfile)
-
-            self.round_to_people = {}
-
-            for line in reader:
-                round_num = int(line.pop(0))
-                self.round_to_people[round_num] = []
-                while line:
-                    start_and_target = []
-                    start_and_target.extend([int(line.pop(0)),
-                                             int(line.pop(0))])
-                    self.round_to_people[round_num].append(start_and_target)
+            for line in csv.reader(csvfile):
+                if line:
+                    round_num, pairs = _parse_arrivals(line)
+                    self.round_to_people[round_num] = pairs
                     # {1: [[1, 2], [5, 6]], 3: [[4, 2]]}
 
-    def generate(self, round_num: int) -> Dict[int, List[Person]]:
+        self._rounds = sorted(self.round_to_people)
+
+    def generate(self, round_num: int) -> Dict[int, List[HeadlessPerson]]:
         """Return the new arrivals for the simulation at the given round.
 
         The returned dictionary maps floor number to the people who
         arrived starting at that floor.
         """
-        list_of_people = []
-        floor_to_people = {}
+        return self._people_by_floor(self.round_to_people.get(round_num, []))
 
-        for i in range(1, self.max_floor + 1):
-            floor_to_people[i] = []
+    def generate_floors(self, round_num: int) -> Tuple[List[int], List[int]]:
+        """Return the start floors and the target floors of the new arrivals
+        at the given round, in the order they appear in the file.
+        """
+        pairs = self.round_to_people.get(round_num, [])
+        return [pair[0] for pair in pairs], [pair[1] for pair in pairs]
+
+    def next_arrival_round(self, round_num: int) -> Optional[int]:
+        """Return the first round at or after <round_num> in which people
+        arrive according to the file, or None if there is no such round.
+        """
+        i = bisect_left(self._rounds, round_num)
+        return self._rounds[i] if i < len(self._rounds) else None
+
+
+class StreamingFileArrivals(ArrivalGenerator):
+    """Generate arrivals from a CSV file, reading it as the rounds go by.
+
+    Unlike FileArrivals, this does not read the whole file up front: only the
+    line for the next round with arrivals is kept in memory. Rounds must
+    therefore be asked for in increasing order, as the simulation does.
+
+    The file is only open while arrivals are being read from it: it is
+    closed when it has been read to the end, and by close or release_files,
+    which the simulation calls at the end of every run. If more arrivals are
+    asked for after that, it is opened again where reading left off.
+
+    === Private Attributes ===
+    _filename: the name of the CSV file
+    _file: the open CSV file, or None while it is closed
+    _position: the position in the file after the line read ahead while the
+               file is closed, or None once all of it has been read
+    _next_round: the round of the line read ahead, or None if there are no
+                 lines left
+    _next_pairs: the [start, target] floor pairs on the line read ahead
+    """
+    _filename: str
+    _file: Optional[TextIO]
+    _position: Optional[int]
+    _next_round: Optional[int]
+    _next_pairs: List[List[int]]
 
-        for l in self.round_to_people.get(round_num, []):
-            new_person = Person(l[0], l[1])
-            list_of_people.append(new_person)
+    def __init__(self, max_floor: int, filename: str) -> None:
+        """Initialize a new StreamingFileArrivals algorithm from the given
+        file.
 
-        for person in list_of_people:
-            floor_to_people[person.start].append(person)
+        The num_people attribute of every StreamingFileArrivals instance is set
+        to None, since the number of arrivals depends on the given file.
 
-        return floor_to_people
+        Precondition:
+            <filename> refers to a valid CSV file, following the specified
+            format and restrictions from the assignment handout, whose lines
+            are in increasing order of round.
+        """
+        ArrivalGenerator.__init__(self, max_floor, None)
+        self._filename = filename
+        self._file = None
+        self._position = 0
+        self._next_round = None
+        self._next_pairs = []
+        self._read_line()
+        self.close()
+
+    def generate(self, round_num: int) -> Dict[int, List[HeadlessPerson]]:
+        """Return the new arrivals for the simulation at the given round.
+
+        The returned dictionary maps floor number to the people who
+        arrived starting at that floor.
+
+        Precondition: round_num is greater than the round of every earlier
+        call to generate or generate_floors.
+        """
+        return self._people_by_floor(self._take_pairs(round_num))
+
+    def generate_floors(self, round_num: int) -> Tuple[List[int], List[int]]:
+        """Return the start floors and the target floors of the new arrivals
+        at the given round, in the order they appear in the file.
+
+        Precondition: round_num is greater than the round of every earlier
+        call to generate or generate_floors.
+        """
+        pairs = self._take_pairs(round_num)
+        return [pair[0] for pair in pairs], [pair[1] for pair in pairs]
+
+    def next_arrival_round(self, round_num: int) -> Optional[int]:
+        """Return the first round at or after <round_num> in which people
+        arrive according to the file, or None if there is no such round.
+        """
+        self._skip_to(round_num)
+        return self._next_round
+
+    def get_state(self) -> Tuple[Optional[int], Optional[int],
+                                 List[List[int]]]:
+        """Return the position in the file after the line read ahead (or
+        None if the whole file has been read), and that line's round and
+        floor pairs.
+        """
+        position = self._position
+        if self._file is not None:
+            position = self._file.tell()
+        return position, self._next_round, self._next_pairs
+
+    def set_state(self, state: Tuple[Optional[int], Optional[int],
+                                     List[List[int]]]) -> None:
+        """Restore a state returned by get_state.
+
+        The file is closed, and opened again when it is next read, so a
+        generator copied into a forked process does not share its position in
+        the file with the original.
+        """
+        self.close()
+        position, self._next_round, pairs = state
+        self._next_pairs = [list(pair) for pair in pairs]
+        self._position = position
+
+    def release_files(self) -> None:
+        """Close the file, if it is open. It is opened again if more
+        arrivals are asked for.
+        """
+        self.close()
+
+    def close(self) -> None:
+        """Close the file, if it is open, remembering where reading left
+        off.
+        """
+        if self._file is not None:
+            self._position = self._file.tell()
+            self._file.close()
+            self._file = None
+
+    def _take_pairs(self, round_num: int) -> List[List[int]]:
+        """Return the [start, target] floor pairs arriving at the given round,
+        and move on to the next line if they came from the line read ahead.
+        """
+        self._skip_to(round_num)
+        if self._next_round != round_num:
+            return []
+        pairs = self._next_pairs
+        self._read_line()
+        return pairs
+
+    def _skip_to(self, round_num: int) -> None:
+        """Read past the lines for rounds before <round_num>."""
+        while self._next_round is not None and self._next_round < round_num:
+            self._read_line()
+
+    def _read_line(self) -> None:
+        """Read the next non-empty line of the file into the read-ahead line,
+        opening the file if it is closed, and closing it once there are no
+        lines left.
+        """
+        self._next_round, self._next_pairs = None, []
+        if self._position is None:
+            return
+        if self._file is None:
+            self._file = open(self._filename)
+            self._file.seek(self._position)
+        while True:
+            line = self._file.readline()
+            if not line:
+                self._file.close()
+                self._file = None
+                self._position = None
+                return
+            elif line.strip():
+                self._next_round, self._next_pairs = _parse_arrivals(
+                    line.split(','))
+                return
+
+
+class BinaryFileArrivals(ArrivalGenerator):
+    """Generate arrivals from a binary trace file written by
+    write_binary_trace.
+
+    The file is memory-mapped rather than read, so opening it is quick no
+    matter how large it is, and simulations in different processes that
+    replay the same trace share one copy of it in the operating system's
+    page cache. A round's arrivals are found by binary search.
+
+    === Private Attributes ===
+    _map: the memory-mapped file, or None once closed
+    _records: the integers in the file after the header, three per person
+              (round, start floor, target floor), without copying them
+    _rounds: the round of each person in _records, as a view of every third
+             integer, without copying them
+    _num_records: the number of people in the file
+    """
+    _map: Optional[mmap.mmap]
+    _records: memoryview
+    _rounds: memoryview
+    _num_records: int
+
+    def __init__(self, max_floor: int, filename: str) -> None:
+        """Initialize a new BinaryFileArrivals algorithm from the given file.
+
+        The num_people attribute of every BinaryFileArrivals instance is set
+        to None, since the number of arrivals depends on the given file.
+
+        Raise ValueError if <filename> is not a binary trace file.
+        """
+        ArrivalGenerator.__init__(self, max_floor, None)
+        with open(filename, 'rb') as trace:
+            self._map = mmap.mmap(trace.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(TRACE_HEADER)] != TRACE_HEADER:
+            self._map.close()
+            raise ValueError(f'{filename} is not a binary arrivals trace')
+        self._records = memoryview(self._map)[len(TRACE_HEADER):].cast('i')
+        self._num_records = len(self._records) // 3
+        self._rounds = self._records[:3 * self._num_records:3]
+
+    def round_slice(self, round_num: int) -> memoryview:
+        """Return the records of the people arriving at the given round, as a
+        flat view of (round, start floor, target floor) integers into the
+        file. Nothing is copied.
+        """
+        first = self._first_record(round_num)
+        last = self._first_record(round_num + 1)
+        return self._records[3 * first:3 * last]
+
+    def generate(self, round_num: int) -> Dict[int, List[HeadlessPerson]]:
+        """Return the new arrivals for the simulation at the given round.
+
+        The returned dictionary maps floor number to the people who
+        arrived starting at that floor.
+        """
+        records = self.round_slice(round_num)
+        return self._people_by_floor(zip(records[1::3], records[2::3]))
+
+    def generate_floors(self, round_num: int) -> Tuple[List[int], List[int]]:
+        """Return the start floors and the target floors of the new arrivals
+        at the given round, in the order they appear in the file.
+        """
+        records = self.round_slice(round_num)
+        return records[1::3].tolist(), records[2::3].tolist()
+
+    def next_arrival_round(self, round_num: int) -> Optional[int]:
+        """Return the first round at or after <round_num> in which people
+        arrive according to the file, or None if there is no such round.
+        """
+        first = self._first_record(round_num)
+        if first == self._num_records:
+            return None
+        return self._records[3 * first]
+
+    def close(self) -> None:
+        """Unmap the file, if it is still mapped."""
+        if self._map is not None:
+            self._rounds.release()
+            self._records.release()
+            self._map.close()
+            self._map = None
+
+    def _first_record(self, round_num: int) -> int:
+        """Return the index of the first person arriving at or after the given
+        round, or the number of people if there is none.
+        """
+        return bisect_left(self._rounds, round_num)
+
+
+# The first bytes of a binary arrivals trace. The rest of the file is one
+# record per person, each made of three 32-bit integers in the machine's byte
+# order: the round they arrive in, their start floor and their target floor.
+# Records are in increasing order of round.
+TRACE_HEADER = b'ELEVTRC1'
+
+
+def write_binary_trace(csv_filename: str, trace_filename: str) -> int:
+    """Convert the arrivals CSV file <csv_filename> into a binary trace file
+    <trace_filename> that BinaryFileArrivals can read, and return the number
+    of people in it.
+
+    The CSV file is read one line at a time. Raise ValueError if its rounds
+    are not in increasing order.
+
+    Precondition:
+        <csv_filename> refers to a valid CSV file, following the specified
+        format and restrictions from the assignment handout.
+    """
+    num_records = 0
+    last_round = None
+    with open(csv_filename) as csvfile, open(trace_filename, 'wb') as trace:
+        trace.write(TRACE_HEADER)
+        for line in csv.reader(csvfile):
+            if not line:
+                continue
+            round_num, pairs = _parse_arrivals(line)
+            if last_round is not None and round_num < last_round:
+                raise ValueError(f'{csv_filename}: round {round_num} comes '
+                                 f'after round {last_round}')
+            last_round = round_num
+
+            records = array('i')
+            for start, target in pairs:
+                records.extend((round_num, start, target))
+            records.tofile(trace)
+            num_records += len(pairs)
+    return num_records
+
+
+def _parse_arrivals(line: List[str]) -> Tuple[int, List[List[int]]]:
+    """Return the round and the [start, target] floor pairs in one line of an
+    arrivals CSV file, given as the list of its fields.
+    """
+    values = [int(value) for value in line]
+    return values[0], [[values[i], values[i + 1]]
+                       for i in range(1, len(values) - 1, 2)]
 
 
 ###############################################################################
@@ -185,10 +828,19 @@ class Direction(Enum):
 
 class MovingAlgorithm:
     """An algorithm to make decisions for moving an elevator at each round.
+
+    === Attributes ===
+    holds_course: True if, while nobody is waiting, this algorithm keeps every
+                  elevator with passengers moving in one direction until it
+                  reaches one of their target floors, and keeps every empty
+                  elevator still. The simulation's event engine can only skip
+                  rounds for algorithms that do this.
     """
+    holds_course: bool = False
+
     def move_elevators(self,
-                       elevators: List[Elevator],
-                       waiting: Dict[int, List[Person]],
+                       elevators: List[HeadlessElevator],
+                       waiting: Dict[int, List[HeadlessPerson]],
                        max_floor: int) -> List[Direction]:
         """Return a list of directions for each elevator to move to.
 
@@ -202,8 +854,24 @@ class MovingAlgorithm:
         """
         raise NotImplementedError
 
+    def get_state(self) -> Any:
+        """Return the state this algorithm keeps between rounds, as plain data
+        that can be pickled, for a simulation snapshot.
+
+        Randomness drawn from the random module is saved by the simulation
+        itself. By default an algorithm keeps no other state, so this returns
+        None.
+        """
+        return None
+
+    def set_state(self, state: Any) -> None:
+        """Restore a state returned by get_state, possibly of another
+        algorithm of the same class.
+        """
+
     def get_start_floor_list(self,
-                             waiting: Dict[int, List[Person]]) -> List[int]:
+                             waiting: Dict[int, List[HeadlessPerson]]
+                             ) -> List[int]:
         """Return a list of starting floor of Person in <waiting>.
         """
         start_list = []
@@ -214,13 +882,42 @@ class MovingAlgorithm:
 
         return start_list
 
+    def _waiting_queues(self, waiting: Dict[int, List[HeadlessPerson]]
+                        ) -> WaitingQueues:
+        """Return <waiting> as WaitingQueues.
+
+        The simulation already passes WaitingQueues, which keep track of the
+        floors where people are waiting; any other dictionary is copied into
+        new queues.
+        """
+        if isinstance(waiting, WaitingQueues):
+            return waiting
+        return WaitingQueues.from_dict(waiting)
+
+    def _to_closest_floor(self, current_floor: int, below: Optional[int],
+                          above: Optional[int]) -> Direction:
+        """Return the direction towards the closer of <below>, the closest
+        floor below <current_floor>, and <above>, the closest floor at or
+        above it. Ties go down.
+
+        Precondition: at least one of below and above is not None.
+        """
+        if below is None:
+            return Direction.UP
+        elif above is None:
+            return Direction.DOWN
+        elif current_floor - below > above - current_floor:
+            return Direction.UP
+        else:
+            return Direction.DOWN
+
 
 class RandomAlgorithm(MovingAlgorithm):
     """A moving algorithm that picks a random direction for each elevator.
     """
     def move_elevators(self,
-                       elevators: List[Elevator],
-                       waiting: Dict[int, List[Person]],
+                       elevators: List[HeadlessElevator],
+                       waiting: Dict[int, List[HeadlessPerson]],
                        max_floor: int) -> List[Direction]:
         three_direct = [Direction.UP, Direction.DOWN, Direction.STAY]
         first_floor_direct = [Direction.UP, Direction.STAY]
@@ -248,22 +945,21 @@ class PushyPassenger(MovingAlgorithm):
     If the elevator isn't empty, it moves towards the target floor of the
     *first* passenger who boarded the elevator.
     """
+    holds_course = True
 
     def move_elevators(self,
-                       elevators: List[Elevator],
-                       waiting: Dict[int, List[Person]],
+                       elevators: List[HeadlessElevator],
+                       waiting: Dict[int, List[HeadlessPerson]],
                        max_floor: int) -> List[Direction]:
+        lowest_floor = self._waiting_queues(waiting).lowest_floor()
         direct_list = []
         for elevator in elevators:
             current_floor = elevator.get_current_floor()
             if len(elevator.passengers) == 0:
-                waiting_list_all = MovingAlgorithm.get_start_floor_list(self,
-                                                                        waiting)
-                if len(waiting_list_all) == 0:
+                if lowest_floor is None:
                     direct_list.append(Direction.STAY)
                 else:
-                    direction = (Direction.UP if current_floor <
-                                 min(waiting_list_all)
+                    direction = (Direction.UP if current_floor < lowest_floor
                                  else Direction.DOWN)
                     direct_list.append(direction)
             else:
@@ -287,59 +983,362 @@ class ShortSighted(MovingAlgorithm):
 
     In this case, the order in which people boarded does *not* matter.
     """
+    holds_course = True
 
     def move_elevators(self,
-                       elevators: List[Elevator],
-                       waiting: Dict[int, List[Person]],
+                       elevators: List[HeadlessElevator],
+                       waiting: Dict[int, List[HeadlessPerson]],
                        max_floor: int) -> List[Direction]:
-        # TODO: Docstring
+        queues = self._waiting_queues(waiting)
         direct_list = []
-        # get_start_floor_list(self, waiting: Dict[int, List[Person]])
         for elevator in elevators:
             current_floor = elevator.get_current_floor()
             if len(elevator.passengers) == 0:
-                waiting_list_all = MovingAlgorithm.get_start_floor_list(self,
-                                                                        waiting)
-                if len(waiting_list_all) == 0:
+                below, above = queues.closest_floors(current_floor)
+                if below is None and above is None:
                     direct_list.append(Direction.STAY)
                 else:
-                    direction = self._to_closest_floor(waiting_list_all,
-                                                       current_floor)
-                    direct_list.append(direction)
+                    direct_list.append(self._to_closest_floor(current_floor,
+                                                              below, above))
             else:
-                passenger_list = elevator.get_passengers()
-                target_floor_list = self._get_target_floor_list(passenger_list)
-                direction = self._to_closest_floor(target_floor_list,
-                                                   current_floor)
-                direct_list.append(direction)
+                below, above = None, None
+                for target in elevator.get_target_floors():
+                    if target < current_floor:
+                        if below is None or target > below:
+                            below = target
+                    elif above is None or target < above:
+                        above = target
+                direct_list.append(self._to_closest_floor(current_floor,
+                                                          below, above))
 
         return direct_list
 
-    def _to_closest_floor(self, list_of_floor: List[int],
-                          current_floor: int) -> Direction:
-        floor_list_copy = list_of_floor.copy()
-        floor_list_copy.append(current_floor)
-        floor_list_copy.sort()
-        current_floor_index = floor_list_copy.index(current_floor)
-        if current_floor_index == 0:
-            return Direction.UP
-        elif current_floor_index == len(floor_list_copy) - 1:
-            return Direction.DOWN
-        else:
-            lower_closest = floor_list_copy[current_floor_index - 1]
-            higher_closest = floor_list_copy[current_floor_index + 1]
-            if current_floor - lower_closest > (higher_closest -
-                                                current_floor):
-                return Direction.UP
+
+class GroupDispatch(MovingAlgorithm):
+    """A moving algorithm that assigns each hall call (the people waiting on
+    a floor to go one way) to a single elevator, picked by an estimate of how
+    long it would take to serve it, so that elevators do not all chase the
+    same floor.
+
+    An elevator with passengers moves towards their closest target floor,
+    going down on ties, and picks up the calls going its way that it passes.
+    An empty elevator moves towards the closest floor of the calls assigned
+    to it, and stays still if it has none.
+
+    The estimated time for an elevator to serve a call is the number of
+    floors it has to travel to get there: straight there if it is empty or
+    the call is on its way, and otherwise by way of the farthest target floor
+    of its passengers in the direction it is going. To that is added
+    stop_cost for each stop it has already committed to (its passengers'
+    target floors and its assigned calls), and load_cost times the fraction
+    of its capacity in use. A full elevator is only picked if every elevator
+    is full.
+
+    Assignments are kept from one round to the next, so each elevator's
+    stops are updated as calls come and go rather than rebuilt. Each round,
+    calls with nobody left waiting are dropped and new calls are assigned.
+    Calls that are still open are estimated again, since the elevators have
+    moved: one whose elevator has become full, or that another elevator is
+    now estimated to serve more than reassign_margin rounds sooner, for
+    example because its elevator has set off on a long trip the other way,
+    is assigned to that elevator instead.
+
+    === Attributes ===
+    stop_cost: the estimated number of rounds each committed stop adds
+    load_cost: the estimated number of rounds a full elevator adds
+    reassign_margin: how many rounds sooner another elevator must be
+                     estimated to serve an assigned call for the call to be
+                     moved to it
+
+    === Private Attributes ===
+    _assigned: maps each assigned call, as a (floor, direction value) pair,
+               to the index of its elevator in the list of elevators
+    _stops: maps the index of each elevator with assigned calls to the
+            floors of those calls, in increasing order
+
+    === Representation invariants ===
+    stop_cost >= 0, load_cost >= 0 and reassign_margin >= 0
+    <floor> appears in _stops[i] once for each direction d with
+    _assigned[(floor, d)] == i.
+    """
+    holds_course = True
+    stop_cost: float
+    load_cost: float
+    reassign_margin: float
+    _assigned: Dict[Tuple[int, int], int]
+    _stops: Dict[int, List[int]]
+
+    def __init__(self, stop_cost: float = 1.0, load_cost: float = 2.0,
+                 reassign_margin: float = 2.0) -> None:
+        """Initialize a new GroupDispatch algorithm with no assignments.
+
+        Precondition: stop_cost >= 0, load_cost >= 0 and reassign_margin >= 0
+        """
+        self.stop_cost = stop_cost
+        self.load_cost = load_cost
+        self.reassign_margin = reassign_margin
+        self._assigned = {}
+        self._stops = {}
+
+    def move_elevators(self,
+                       elevators: List[HeadlessElevator],
+                       waiting: Dict[int, List[HeadlessPerson]],
+                       max_floor: int) -> List[Direction]:
+        queues = self._waiting_queues(waiting)
+        full = [elevator.fullness() >= 1 for elevator in elevators]
+        for call in list(self._assigned):
+            if not queues.count(*call):
+                self._unassign(call)
+
+        # The direction each elevator is heading in, or STAY if it is empty.
+        headings = [self._heading(elevator) for elevator in elevators]
+
+        # New calls, and the calls of elevators that are full or have
+        # changed course, are estimated for every elevator. While some
+        # elevators are idle, the other calls are estimated for them, in
+        # case they can take them over.
+        everyone = range(len(elevators))
+        idle = [index for index, elevator in enumerate(elevators)
+                if not elevator.passengers and index not in self._stops]
+        changed = {index for index, elevator in enumerate(elevators)
+                   if full[index] or (elevator.passengers and
+                                      headings[index].value !=
+                                      elevator.direction)}
+        calls = []
+        for direction in (Direction.UP.value, Direction.DOWN.value):
+            for floor in queues.occupied_floors(direction):
+                index = self._assigned.get((floor, direction))
+                if index is None or index in changed:
+                    calls.append(((floor, direction), everyone))
+                elif idle:
+                    calls.append(((floor, direction), idle))
+        if calls:
+            # Everything about an elevator except its distance to the call
+            # is the same for every call estimated this round.
+            costs = []
+            for index, elevator in enumerate(elevators):
+                targets = elevator.get_target_floors()
+                heading = headings[index].value
+                current_floor = elevator.get_current_floor()
+                farthest = max([(target - current_floor) * heading
+                                for target in targets], default=0)
+                stops = len(targets) + len(self._stops.get(index, []))
+                costs.append((full[index], current_floor, heading,
+                              current_floor + farthest * heading,
+                              self.stop_cost * stops +
+                              self.load_cost * elevator.fullness()))
+            for call, candidates in calls:
+                best_index, best_cost = self._best_elevator(call, costs,
+                                                            candidates)
+                index = self._assigned.get(call)
+                if index is None:
+                    self._assign(call, best_index)
+                elif index != best_index:
+                    # The call itself is one of the stops counted for its
+                    # own elevator, but not for the others.
+                    full_now, cost = self._best_elevator(call, costs,
+                                                         [index])[1]
+                    if (full_now > best_cost[0] or cost - self.stop_cost >
+                            best_cost[1] + self.reassign_margin):
+                        self._unassign(call)
+                        self._assign(call, best_index)
+
+        direct_list = []
+        for index, elevator in enumerate(elevators):
+            current_floor = elevator.get_current_floor()
+            if elevator.passengers:
+                direct_list.append(headings[index])
+                continue
+            stops = self._stops.get(index, [])
+            i = bisect_left(stops, current_floor)
+            below = stops[i - 1] if i > 0 else None
+            above = stops[i] if i < len(stops) else None
+            if (below is None and above is None) or above == current_floor:
+                direct_list.append(Direction.STAY)
+            else:
+                direct_list.append(self._to_closest_floor(current_floor,
+                                                          below, above))
+
+        return direct_list
+
+    def get_state(self) -> Dict[Tuple[int, int], int]:
+        """Return the call assignments, mapping each assigned call to the
+        index of its elevator.
+        """
+        return dict(self._assigned)
+
+    def set_state(self, state: Dict[Tuple[int, int], int]) -> None:
+        """Restore call assignments returned by get_state."""
+        self._assigned = {}
+        self._stops = {}
+        for call, index in state.items():
+            self._assign(call, index)
+
+    def _heading(self, elevator: HeadlessElevator) -> Direction:
+        """Return the direction towards the closest target floor of the
+        passengers on <elevator>, going down on ties, or STAY if it is
+        empty.
+        """
+        current_floor = elevator.get_current_floor()
+        below, above = None, None
+        for target in elevator.get_target_floors():
+            if target < current_floor:
+                if below is None or target > below:
+                    below = target
+            elif above is None or target < above:
+                above = target
+        if below is None and above is None:
+            return Direction.STAY
+        return self._to_closest_floor(current_floor, below, above)
+
+    @staticmethod
+    def _best_elevator(call: Tuple[int, int],
+                       costs: List[Tuple[bool, int, int, int, float]],
+                       candidates: Iterable[int]
+                       ) -> Tuple[int, Tuple[bool, float]]:
+        """Return the index of the elevator among the indices <candidates>
+        estimated to serve <call> soonest, and its estimate, as whether it is
+        full and the estimated number of rounds. Ties go to the elevator that
+        comes first.
+
+        <costs> holds, for each elevator, whether it is full, its current
+        floor, the value of the direction it is heading in, the farthest
+        target floor of its passengers that way, and the estimated rounds its
+        stops and load add.
+
+        Precondition: <candidates> is not empty
+        """
+        floor, direction = call
+        best_index, best_cost = 0, None
+        for index in candidates:
+            full, current_floor, heading, farthest, delay = costs[index]
+            if heading == 0 or (heading == direction and
+                                (floor - current_floor) * heading >= 0):
+                distance = abs(floor - current_floor)
             else:
-                return Direction.DOWN
+                distance = (abs(farthest - current_floor) +
+                            abs(floor - farthest))
+            cost = (full, distance + delay)
+            if best_cost is None or cost < best_cost:
+                best_index, best_cost = index, cost
+        return best_index, best_cost
+
+    def _assign(self, call: Tuple[int, int], index: int) -> None:
+        """Assign <call> to the elevator at <index>."""
+        self._assigned[call] = index
+        insort(self._stops.setdefault(index, []), call[0])
+
+    def _unassign(self, call: Tuple[int, int]) -> None:
+        """Drop the assignment of <call>."""
+        index = self._assigned.pop(call)
+        stops = self._stops[index]
+        del stops[bisect_left(stops, call[0])]
+        if not stops:
+            del self._stops[index]
+
+
+class Look(MovingAlgorithm):
+    """A collective moving algorithm that sweeps each elevator up and down
+    the building, in the style of the LOOK disk scheduling algorithm.
+
+    Each elevator keeps the direction it is travelling in from one round to
+    the next. While there is a stop ahead of it in that direction, it keeps
+    going; it only turns around once there are no stops ahead, and stays
+    still once it has no stops at all. An elevator that is standing still
+    sets off towards its closest stop, going down on ties.
+
+    The one exception is an empty elevator that takes on people going
+    against its sweep, which it does when the person who has waited longest
+    on its floor is going that way. Everyone on an elevator goes the same
+    way, so it turns around at once to take them there.
+
+    The stops of an elevator are its passengers' target floors and, unless
+    it is full, the floors where people are waiting. An elevator with
+    passengers only counts people going up above it and people going down
+    below it, since those are the only ones it can pick up on its way. Stops
+    are read from the elevator's index of target floors and the waiting
+    queues' indexes of floors with people going each way, all kept up to date
+    as people board and leave, so nothing is rebuilt from the waiting people
+    each round.
+
+    === Private Attributes ===
+    _directions: the direction each elevator is travelling in, by index in
+                 the list of elevators, or STAY if it is standing still
+    """
+    holds_course = True
+    _directions: List[Direction]
 
-    def _get_target_floor_list(self, passenger_list: List[Person]) -> List[int]:
-        target_floor = []
-        for person in passenger_list:
-            target_floor.append(person.get_target_floor())
+    def __init__(self) -> None:
+        """Initialize a new Look algorithm, with every elevator standing
+        still.
+        """
+        self._directions = []
 
-        return target_floor
+    def move_elevators(self,
+                       elevators: List[HeadlessElevator],
+                       waiting: Dict[int, List[HeadlessPerson]],
+                       max_floor: int) -> List[Direction]:
+        queues = self._waiting_queues(waiting)
+        if len(self._directions) != len(elevators):
+            self._directions = [Direction.STAY] * len(elevators)
+
+        for index, elevator in enumerate(elevators):
+            current_floor = elevator.get_current_floor()
+            below, above = None, None
+            for target in elevator.get_target_floors():
+                if target < current_floor:
+                    if below is None or target > below:
+                        below = target
+                elif target > current_floor:
+                    if above is None or target < above:
+                        above = target
+            passengers_below, passengers_above = below, above
+
+            # People waiting on this floor could not board this elevator, so
+            # they are not a stop for it. An elevator with passengers only
+            # stops for people going the way it will be going.
+            if elevator.fullness() < 1:
+                down, up = ((None, None) if not elevator.passengers
+                            else (Direction.DOWN.value, Direction.UP.value))
+                waiting_below = queues.closest_floors(current_floor, down)[0]
+                waiting_above = queues.closest_floors(current_floor + 1,
+                                                      up)[1]
+                if waiting_below is not None and (below is None or
+                                                  waiting_below > below):
+                    below = waiting_below
+                if waiting_above is not None and (above is None or
+                                                  waiting_above < above):
+                    above = waiting_above
+
+            direction = self._directions[index]
+            # An elevator that has just taken on people going against its
+            # sweep turns to their way, since they cannot leave until it
+            # does.
+            if (direction == Direction.UP and passengers_above is None and
+                    passengers_below is not None):
+                direction = Direction.DOWN
+            elif (direction == Direction.DOWN and passengers_below is None and
+                  passengers_above is not None):
+                direction = Direction.UP
+            if direction == Direction.UP and above is None:
+                direction = Direction.STAY if below is None else Direction.DOWN
+            elif direction == Direction.DOWN and below is None:
+                direction = Direction.STAY if above is None else Direction.UP
+            if direction == Direction.STAY and (below is not None or
+                                                above is not None):
+                direction = self._to_closest_floor(current_floor, below,
+                                                   above)
+            self._directions[index] = direction
+
+        return list(self._directions)
+
+    def get_state(self) -> List[int]:
+        """Return the value of the direction of each elevator."""
+        return [direction.value for direction in self._directions]
+
+    def set_state(self, state: List[int]) -> None:
+        """Restore directions returned by get_state."""
+        self._directions = [Direction(value) for value in state]
 
 
 if __name__ == '__main__':
@@ -347,7 +1346,8 @@ if __name__ == '__main__':
     import python_ta
     python_ta.check_all(config={
         'allowed-io': ['__init__'],
-        'extra-imports': ['entities', 'random', 'csv', 'enum'],
+        'extra-imports': ['entities', 'waiting', 'array', 'bisect', 'mmap',
+                          'numpy', 'random', 'csv', 'enum'],
         'max-nested-blocks': 4,
         'disable': ['R0201']
     })
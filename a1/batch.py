@@ -0,0 +1,423 @@
+"""CSC148 Assignment 1 - Batch Simulation
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module description ===
+This module contains BatchSimulation, which runs many independent simulations
+side by side. Instead of Person and Elevator objects, it keeps the state of
+every run in NumPy arrays with one row per run, and advances all of the runs
+one round at a time with vectorized versions of the PushyPassenger and
+ShortSighted moving algorithms.
+
+This module needs NumPy, which the rest of the simulation does not.
+"""
+from typing import Any, Dict, List
+
+import numpy as np
+
+import algorithms
+from stats import TimeStats, TripStats
+
+
+# Larger than any floor number or boarding order.
+_FAR = np.iinfo(np.int64).max
+
+
+class BatchSimulation:
+    """Many independent simulations, run side by side.
+
+    Each run has its own configuration, in the same format as for Simulation.
+    config['visualize'] and config['engine'] are ignored,
+    config['moving_algorithm'] must be a PushyPassenger or a ShortSighted, and
+    config['kinematics'] and config['served_floors'] must not be set.
+    Runs with fewer elevators than others are padded with elevators that
+    never board anyone or move.
+
+    Each run still has its own arrival generator, which is asked for that
+    run's arrivals every round. Generators that draw from the shared random
+    module therefore draw in a different order than separate Simulations
+    would.
+
+    Waiting people are kept in "slots": column j of the waiting arrays holds
+    one waiting person of each run, or nobody. Arrivals fill new columns, and
+    columns of people who have boarded are dropped now and then, so the
+    column order is always the order people arrived in. Passengers are kept
+    in "seats": seat k of each elevator holds one passenger, or nobody.
+
+    === Private Attributes ===
+    _generators: the arrival generator of each run
+    _short_sighted: whether each run uses ShortSighted (otherwise it uses
+                    PushyPassenger); shape (runs,)
+    _capacity: the max capacity of each elevator, or 0 for padding;
+               shape (runs, elevators)
+    _floor: the current floor of each elevator; shape (runs, elevators)
+    _load: the number of passengers in each elevator; shape (runs, elevators)
+    _direction: the direction of each elevator's last move, as 1, -1 or 0;
+                shape (runs, elevators)
+    _queue_count: the number of people waiting on each floor, with floor f at
+                  index f; shape (runs, floors + 1)
+    _queue_up: the number of people waiting on each floor who are going up,
+               with floor f at index f; shape (runs, floors + 1)
+    _width: the number of waiting slots in use
+    _waiting: whether each slot holds a waiting person; shape (runs, slots)
+    _start: the start floor of each waiting person; shape (runs, slots)
+    _target: the target floor of each waiting person; shape (runs, slots)
+    _arrival: the round each waiting person arrived in; shape (runs, slots)
+    _seat_target: the target floor of each passenger, or 0 for an empty
+                  seat; shape (runs, elevators, seats)
+    _seat_arrival: the round each passenger arrived in;
+                   shape (runs, elevators, seats)
+    _seat_boarded: the round each passenger boarded in;
+                   shape (runs, elevators, seats)
+    _seat_order: a key giving the order passengers boarded in;
+                 shape (runs, elevators, seats)
+    _next_order: the smallest boarding order key not used yet
+    _num_round: the number of rounds run so far
+    _total_people: the number of people generated in each run
+    _trip_stats: the statistics of the trips completed in each run
+
+    === Representation invariants ===
+    Only the first _width columns of the waiting arrays are in use.
+    _queue_count[b, f] is the number of waiting slots of run b on floor f.
+    _queue_up[b, f] is the number of those slots with a target above f.
+    _load[b, e] is the number of non-empty seats of elevator e in run b.
+    """
+    _generators: List[algorithms.ArrivalGenerator]
+    _short_sighted: np.ndarray
+    _capacity: np.ndarray
+    _floor: np.ndarray
+    _load: np.ndarray
+    _direction: np.ndarray
+    _queue_count: np.ndarray
+    _queue_up: np.ndarray
+    _width: int
+    _waiting: np.ndarray
+    _start: np.ndarray
+    _target: np.ndarray
+    _arrival: np.ndarray
+    _seat_target: np.ndarray
+    _seat_arrival: np.ndarray
+    _seat_boarded: np.ndarray
+    _seat_order: np.ndarray
+    _next_order: int
+    _num_round: int
+    _total_people: np.ndarray
+    _trip_stats: List[TripStats]
+
+    def __init__(self, configs: List[Dict[str, Any]]) -> None:
+        """Initialize a batch with one run for each configuration.
+
+        Raise ValueError if a configuration uses a moving algorithm other
+        than PushyPassenger or ShortSighted, or sets config['kinematics'] or
+        config['served_floors'].
+
+        Precondition: len(configs) >= 1
+        """
+        for config in configs:
+            if type(config['moving_algorithm']) not in (
+                    algorithms.PushyPassenger, algorithms.ShortSighted):
+                raise ValueError('BatchSimulation only supports the '
+                                 'PushyPassenger and ShortSighted algorithms')
+            if config.get('kinematics') is not None:
+                raise ValueError('BatchSimulation only moves elevators one '
+                                 'floor every round')
+            if config.get('served_floors') is not None:
+                raise ValueError('BatchSimulation only supports elevators '
+                                 'that serve every floor')
+
+        num_runs = len(configs)
+        num_elevators = max(config['num_elevators'] for config in configs)
+        num_floors = max(config['num_floors'] for config in configs)
+        num_seats = max(config['elevator_capacity'] for config in configs)
+
+        self._generators = [config['arrival_generator'] for config in configs]
+        self._short_sighted = np.array(
+            [isinstance(config['moving_algorithm'], algorithms.ShortSighted)
+             for config in configs])
+
+        self._capacity = np.zeros((num_runs, num_elevators), dtype=np.int64)
+        for run, config in enumerate(configs):
+            self._capacity[run, :config['num_elevators']] = \
+                config['elevator_capacity']
+        self._floor = np.ones((num_runs, num_elevators), dtype=np.int64)
+        self._load = np.zeros((num_runs, num_elevators), dtype=np.int64)
+        self._direction = np.zeros((num_runs, num_elevators), dtype=np.int64)
+        self._queue_count = np.zeros((num_runs, num_floors + 1),
+                                     dtype=np.int64)
+        self._queue_up = np.zeros((num_runs, num_floors + 1), dtype=np.int64)
+
+        self._width = 0
+        self._waiting = np.zeros((num_runs, 16), dtype=bool)
+        self._start = np.zeros((num_runs, 16), dtype=np.int64)
+        self._target = np.zeros((num_runs, 16), dtype=np.int64)
+        self._arrival = np.zeros((num_runs, 16), dtype=np.int64)
+
+        seats = (num_runs, num_elevators, num_seats)
+        self._seat_target = np.zeros(seats, dtype=np.int64)
+        self._seat_arrival = np.zeros(seats, dtype=np.int64)
+        self._seat_boarded = np.zeros(seats, dtype=np.int64)
+        self._seat_order = np.zeros(seats, dtype=np.int64)
+        self._next_order = 0
+
+        self._num_round = 0
+        self._total_people = np.zeros(num_runs, dtype=np.int64)
+        self._trip_stats = [TripStats() for _ in configs]
+
+    def run(self, num_rounds: int) -> List[Dict[str, int]]:
+        """Run every simulation in this batch for the given number of rounds.
+
+        Return the statistics of each run, in the same order as the
+        configurations and in the same format as Simulation.run.
+
+        Precondition: num_rounds >= 1.
+        """
+        for round_num in range(num_rounds):
+            self._generate_arrivals(round_num)
+            self._handle_leaving()
+            self._handle_boarding()
+            self._move_elevators()
+        return self._calculate_stats()
+
+    def _generate_arrivals(self, round_num: int) -> None:
+        """Add the people arriving in each run at the given round to new
+        waiting slots.
+        """
+        arrivals = [generator.generate_floors(round_num)
+                    for generator in self._generators]
+        counts = np.array([len(starts) for starts, _ in arrivals])
+        added = int(counts.max())
+        if added == 0:
+            return
+
+        self._drop_boarded_slots()
+        if self._width + added > self._waiting.shape[1]:
+            self._resize_slots(2 * (self._width + added))
+
+        columns = slice(self._width, self._width + added)
+        for run, (starts, targets) in enumerate(arrivals):
+            count = counts[run]
+            if count:
+                self._start[run, self._width:self._width + count] = starts
+                self._target[run, self._width:self._width + count] = targets
+        self._waiting[:, columns] = np.arange(added) < counts[:, None]
+        self._arrival[:, columns] = self._num_round
+        self._width += added
+
+        runs, slots = np.nonzero(self._waiting[:, columns])
+        slots += columns.start
+        starts = self._start[runs, slots]
+        np.add.at(self._queue_count, (runs, starts), 1)
+        up = self._target[runs, slots] > starts
+        np.add.at(self._queue_up, (runs[up], starts[up]), 1)
+        self._total_people += counts
+
+    def _drop_boarded_slots(self) -> None:
+        """Drop the waiting slots of people who have boarded once they make up
+        most of the slots in use, keeping the order of the other slots.
+        """
+        waiting = self._waiting[:, :self._width]
+        width = int(waiting.sum(axis=1).max(initial=0))
+        if 2 * width > self._width:
+            return
+
+        # A stable sort moves each run's waiting slots to the front, in order.
+        keep = np.argsort(~waiting, axis=1, kind='stable')[:, :width]
+        for name in ['_waiting', '_start', '_target', '_arrival']:
+            slots = getattr(self, name)
+            slots[:, :width] = np.take_along_axis(slots[:, :self._width],
+                                                  keep, axis=1)
+        self._waiting[:, width:self._width] = False
+        self._width = width
+
+    def _resize_slots(self, num_slots: int) -> None:
+        """Make room for <num_slots> waiting slots."""
+        for name in ['_waiting', '_start', '_target', '_arrival']:
+            slots = getattr(self, name)
+            resized = np.zeros((slots.shape[0], num_slots), dtype=slots.dtype)
+            resized[:, :self._width] = slots[:, :self._width]
+            setattr(self, name, resized)
+
+    def _handle_leaving(self) -> None:
+        """Empty the seats of passengers who are at their target floor, and
+        record their trip times.
+        """
+        leaving = self._seat_target == self._floor[:, :, None]
+        if not leaving.any():
+            return
+
+        runs = np.nonzero(leaving)[0]
+        arrival = self._seat_arrival[leaving]
+        boarded = self._seat_boarded[leaving]
+        for name, times in [('wait', self._num_round - arrival),
+                            ('queue', boarded - arrival),
+                            ('car', self._num_round - boarded)]:
+            self._add_times(name, runs, times)
+
+        self._load -= leaving.sum(axis=2)
+        self._seat_target[leaving] = 0
+
+    def _add_times(self, name: str, runs: np.ndarray,
+                   times: np.ndarray) -> None:
+        """Add each time in <times> to the <name> statistics of the trips of
+        the run at the same index of <runs>.
+        """
+        pairs, counts = np.unique(np.stack([runs, times]), axis=1,
+                                  return_counts=True)
+        for (run, time), count in zip(pairs.T.tolist(), counts.tolist()):
+            time_stats: TimeStats = getattr(self._trip_stats[run], name)
+            time_stats.add(time, count)
+
+    def _handle_boarding(self) -> None:
+        """Board waiting people onto the elevators at their floor, first come
+        first served and only going the elevator's way, one elevator at a
+        time like Simulation does.
+        """
+        all_runs = np.arange(self._floor.shape[0])
+        for elevator in range(self._floor.shape[1]):
+            floor = self._floor[:, elevator]
+            free = self._capacity[:, elevator] - self._load[:, elevator]
+            runs = np.nonzero((free > 0) &
+                              (self._queue_count[all_runs, floor] > 0))[0]
+            if len(runs) == 0:
+                continue
+            floor_here = floor[runs, None]
+            here = (self._waiting[runs, :self._width] &
+                    (self._start[runs, :self._width] == floor_here))
+            going_up = self._target[runs, :self._width] > floor_here
+
+            # The way each elevator goes, as Simulation._handle_boarding
+            # picks it: that of the first person waiting if it is empty,
+            # otherwise that of its last move, or of its first passenger.
+            first_waiting = np.argmax(here, axis=1)
+            seated = self._seat_target[runs, elevator] > 0
+            first_seat = np.argmin(
+                np.where(seated, self._seat_order[runs, elevator], _FAR),
+                axis=1)
+            first_target = self._seat_target[runs, elevator, first_seat]
+            up = np.where(
+                self._load[runs, elevator] == 0,
+                going_up[np.arange(len(runs)), first_waiting],
+                np.where(self._direction[runs, elevator] != 0,
+                         self._direction[runs, elevator] > 0,
+                         first_target > floor[runs]))
+            queue_up = self._queue_up[runs, floor[runs]]
+            boarding_count = np.zeros_like(free)
+            boarding_count[runs] = np.minimum(
+                free[runs],
+                np.where(up, queue_up,
+                         self._queue_count[runs, floor[runs]] - queue_up))
+
+            # Take the first boarding_count waiting slots on each floor that
+            # are going that way.
+            here &= going_up == up[:, None]
+            rank = np.cumsum(here, axis=1) - 1
+            boarding = here & (rank < boarding_count[runs, None])
+            people_runs, people_slots = np.nonzero(boarding)
+
+            # Seat them in the first empty seats, in the same order.
+            empty = self._seat_target[runs, elevator] == 0
+            seat_rank = np.cumsum(empty, axis=1) - 1
+            seats = empty & (seat_rank < boarding_count[runs, None])
+            seat_runs, seat_numbers = np.nonzero(seats)
+
+            people_runs = runs[people_runs]
+            seat_runs = runs[seat_runs]
+            self._seat_target[seat_runs, elevator, seat_numbers] = \
+                self._target[people_runs, people_slots]
+            self._seat_arrival[seat_runs, elevator, seat_numbers] = \
+                self._arrival[people_runs, people_slots]
+            self._seat_boarded[seat_runs, elevator, seat_numbers] = \
+                self._num_round
+            self._seat_order[seat_runs, elevator, seat_numbers] = \
+                self._next_order + rank[boarding]
+            self._next_order += self._width
+
+            self._waiting[people_runs, people_slots] = False
+            self._queue_count[runs, floor[runs]] -= boarding_count[runs]
+            self._queue_up[runs, floor[runs]] -= np.where(
+                up, boarding_count[runs], 0)
+            self._load[:, elevator] += boarding_count
+
+        self._num_round += 1
+
+    def _move_elevators(self) -> None:
+        """Move every elevator one floor up or down, or keep it still, the
+        way PushyPassenger or ShortSighted would.
+        """
+        num_runs = self._floor.shape[0]
+        floors = np.arange(self._queue_count.shape[1])
+        floor = self._floor
+        empty = self._load == 0
+        occupied = self._queue_count > 0
+
+        # The highest floor with people waiting below each floor, or -1, and
+        # the lowest floor with people waiting at or above it, or _FAR.
+        below_floor = np.maximum.accumulate(
+            np.where(occupied, floors, -1), axis=1)
+        below_floor = np.hstack([np.full((num_runs, 1), -1),
+                                 below_floor[:, :-1]])
+        above_floor = np.minimum.accumulate(
+            np.where(occupied, floors, _FAR)[:, ::-1], axis=1)[:, ::-1]
+        waiting_below = np.take_along_axis(below_floor, floor, axis=1)
+        waiting_above = np.take_along_axis(above_floor, floor, axis=1)
+        lowest_waiting = above_floor[:, :1]
+
+        seated = self._seat_target > 0
+        target_below = np.where(
+            seated & (self._seat_target < floor[:, :, None]),
+            self._seat_target, -1).max(axis=2)
+        target_above = np.where(
+            seated & (self._seat_target >= floor[:, :, None]),
+            self._seat_target, _FAR).min(axis=2)
+        first_seat = np.argmin(np.where(seated, self._seat_order, _FAR),
+                               axis=2)
+        first_target = np.take_along_axis(
+            self._seat_target, first_seat[:, :, None], axis=2)[:, :, 0]
+
+        # PushyPassenger: go towards the lowest floor with people waiting, or
+        # the target of the passenger who boarded first.
+        pushy = np.where(
+            empty,
+            np.where(lowest_waiting == _FAR, 0,
+                     np.where(floor < lowest_waiting, 1, -1)),
+            np.where(floor < first_target, 1, -1))
+
+        # ShortSighted: go towards the closest floor with people waiting, or
+        # the closest passenger target, going down on ties.
+        below = np.where(empty, waiting_below, target_below)
+        above = np.where(empty, waiting_above, target_above)
+        short_sighted = np.where(
+            below < 0,
+            np.where(above == _FAR, 0, 1),
+            np.where((above == _FAR) | (floor - below <= above - floor),
+                     -1, 1))
+
+        directions = np.where(self._short_sighted[:, None], short_sighted,
+                              pushy)
+        directions[self._capacity == 0] = 0
+        self._floor += directions
+        self._direction = directions
+
+    def _calculate_stats(self) -> List[Dict[str, int]]:
+        """Report the statistics of each run, as Simulation._calculate_stats
+        does.
+        """
+        stats = []
+        for run in range(len(self._generators)):
+            run_stats = {
+                'num_iterations': self._num_round,
+                'total_people': int(self._total_people[run])
+            }
+            run_stats.update(self._trip_stats[run].summary())
+            stats.append(run_stats)
+        return stats
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['numpy', 'algorithms'],
+        'max-attributes': 21
+    })
@@ -0,0 +1,283 @@
+"""CSC148 Assignment 1 - Simulation benchmark
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module description ===
+This script measures how fast a headless Simulation runs, for every
+combination of a building size, a moving algorithm and an arrival generator.
+Sizes go from 5 floors with 1 elevator up to 200 floors with 64 elevators and
+thousands of arrivals each round.
+
+For each combination it reports the number of rounds run per second, in the
+fastest of a few repeats, and the peak memory allocated by Python during the
+run. Memory is measured with tracemalloc in a second, separate run, since
+tracing slows the simulation down.
+
+Results can be saved as a baseline, and later results compared against it,
+so that a change that slows the simulation down shows up locally. The
+baseline file is not checked in, since timings depend on the machine.
+
+Run it from this directory:
+    python bench_simulation.py [--sizes small medium] [--save | --compare]
+Use --help to see every option.
+"""
+import argparse
+import functools
+import importlib.util
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+import algorithms
+from simulation import Simulation
+
+# The building sizes, in increasing order. Each has a number of floors,
+# elevators, the capacity of each elevator, the number of people arriving
+# each round, and the number of rounds to run.
+SIZES = {
+    'tiny': {'floors': 5, 'elevators': 1, 'capacity': 4, 'arrivals': 2,
+             'rounds': 2000},
+    'small': {'floors': 20, 'elevators': 4, 'capacity': 8, 'arrivals': 20,
+              'rounds': 1000},
+    'medium': {'floors': 50, 'elevators': 16, 'capacity': 16,
+               'arrivals': 200, 'rounds': 200},
+    'large': {'floors': 200, 'elevators': 64, 'capacity': 32,
+              'arrivals': 2000, 'rounds': 40}
+}
+
+MOVING_ALGORITHMS = ['RandomAlgorithm', 'PushyPassenger', 'ShortSighted',
+                     'GroupDispatch', 'Look']
+
+ARRIVAL_GENERATORS = ['RandomArrivals', 'VectorRandomArrivals',
+                      'PoissonArrivals', 'FileArrivals',
+                      'StreamingFileArrivals', 'BinaryFileArrivals']
+
+# The generators that need NumPy.
+NUMPY_GENERATORS = ['VectorRandomArrivals', 'PoissonArrivals']
+
+# The default baseline file, next to this script.
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'bench_baseline.json')
+
+
+def write_trace(size: Dict[str, int], directory: str) -> Dict[str, str]:
+    """Write the arrivals of a run of <size> to a CSV file and a binary trace
+    file in <directory>, and return their names under 'csv' and 'binary'.
+
+    The arrivals are drawn like RandomArrivals would draw them.
+    """
+    rng = random.Random(0)
+    floors = size['floors']
+    name = os.path.join(directory, f'{floors}x{size["arrivals"]}')
+    with open(name + '.csv', 'w') as csv_file:
+        for round_num in range(size['rounds']):
+            cells = [str(round_num)]
+            for _ in range(size['arrivals']):
+                start = rng.randint(1, floors)
+                target = rng.randint(1, floors - 1)
+                if target >= start:
+                    target += 1
+                cells += [str(start), str(target)]
+            csv_file.write(', '.join(cells) + '\n')
+    algorithms.write_binary_trace(name + '.csv', name + '.bin')
+    return {'csv': name + '.csv', 'binary': name + '.bin'}
+
+
+def make_generator(name: str, size: Dict[str, int],
+                   trace: Dict[str, str]) -> algorithms.ArrivalGenerator:
+    """Return a new arrival generator of the class <name> for <size>.
+
+    File-based generators replay <trace>.
+    """
+    floors, arrivals = size['floors'], size['arrivals']
+    if name == 'RandomArrivals':
+        return algorithms.RandomArrivals(floors, arrivals)
+    elif name == 'VectorRandomArrivals':
+        return algorithms.VectorRandomArrivals(floors, arrivals, seed=0)
+    elif name == 'PoissonArrivals':
+        return algorithms.PoissonArrivals(floors, [[arrivals / floors] *
+                                                   floors],
+                                          size['rounds'], seed=0)
+    elif name == 'FileArrivals':
+        return algorithms.FileArrivals(floors, trace['csv'])
+    elif name == 'StreamingFileArrivals':
+        return algorithms.StreamingFileArrivals(floors, trace['csv'])
+    else:
+        return algorithms.BinaryFileArrivals(floors, trace['binary'])
+
+
+def run_case(size: Dict[str, int], algorithm: str,
+             make: Callable[[], algorithms.ArrivalGenerator],
+             repeats: int, measure_memory: bool) -> Dict[str, Any]:
+    """Run one benchmark case <repeats> times, and return its rounds per
+    second in the fastest run, and its peak memory in bytes if
+    <measure_memory> is True.
+
+    <make> returns a new arrival generator for each run. Building the
+    generator and the simulation is not timed.
+    """
+    def simulation() -> Simulation:
+        random.seed(0)
+        return Simulation({
+            'num_floors': size['floors'],
+            'num_elevators': size['elevators'],
+            'elevator_capacity': size['capacity'],
+            'num_people_per_round': size['arrivals'],
+            'arrival_generator': make(),
+            'moving_algorithm': getattr(algorithms, algorithm)(),
+            'visualize': False
+        })
+
+    seconds = []
+    for _ in range(repeats):
+        sim = simulation()
+        start = time.perf_counter()
+        sim.run(size['rounds'])
+        seconds.append(time.perf_counter() - start)
+        _close(sim.arrival_generator)
+    result = {'rounds_per_second': size['rounds'] / min(seconds),
+              'peak_bytes': None}
+
+    if measure_memory:
+        sim = simulation()
+        tracemalloc.start()
+        sim.run(size['rounds'])
+        result['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        _close(sim.arrival_generator)
+    return result
+
+
+def _close(generator: algorithms.ArrivalGenerator) -> None:
+    """Close <generator> if it holds a file open."""
+    if hasattr(generator, 'close'):
+        generator.close()
+
+
+def run_suite(sizes: List[str], moving_algorithms: List[str],
+              generators: List[str], repeats: int,
+              measure_memory: bool) -> Dict[str, Dict[str, Any]]:
+    """Run every combination of <sizes>, <moving_algorithms> and
+    <generators> <repeats> times, print each result as it finishes, and
+    return the results by case name.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for size_name in sizes:
+            size = SIZES[size_name]
+            trace = write_trace(size, directory)
+            for algorithm in moving_algorithms:
+                for generator in generators:
+                    case = f'{size_name}/{algorithm}/{generator}'
+                    result = run_case(
+                        size, algorithm,
+                        functools.partial(make_generator, generator, size,
+                                          trace),
+                        repeats, measure_memory)
+                    results[case] = result
+                    print(_format_row(case, result), flush=True)
+    return results
+
+
+def compare(results: Dict[str, Dict[str, Any]],
+            baseline: Dict[str, Dict[str, Any]], tolerance: float) -> bool:
+    """Print how <results> compare with <baseline>, and return whether any
+    case is more than <tolerance> (a fraction) slower, or uses more than
+    <tolerance> more peak memory, than in the baseline.
+    """
+    print()
+    print(f'{"case":<50} {"speed":>8} {"memory":>8}')
+    regressed = False
+    for case, result in results.items():
+        if case not in baseline:
+            continue
+        old = baseline[case]
+        speed = result['rounds_per_second'] / old['rounds_per_second']
+        memory = _ratio(result['peak_bytes'], old['peak_bytes'])
+        slower = speed < 1 - tolerance
+        bigger = memory is not None and memory > 1 + tolerance
+        regressed = regressed or slower or bigger
+        memory_text = '-' if memory is None else f'{memory:.2f}x'
+        flag = '  REGRESSION' if slower or bigger else ''
+        print(f'{case:<50} {speed:>7.2f}x {memory_text:>8}{flag}')
+    return regressed
+
+
+def _ratio(new: Optional[int], old: Optional[int]) -> Optional[float]:
+    """Return new / old, or None if either is missing."""
+    if new is None or not old:
+        return None
+    return new / old
+
+
+def _format_row(case: str, result: Dict[str, Any]) -> str:
+    """Return a line of output for the result of <case>."""
+    memory = result['peak_bytes']
+    memory_text = '-' if memory is None else f'{memory / 2 ** 20:.1f} MiB'
+    return (f'{case:<50} {result["rounds_per_second"]:>10.1f} rounds/s '
+            f'{memory_text:>12}')
+
+
+def main(argv: List[str]) -> int:
+    """Run the benchmark suite with the command line arguments <argv>, and
+    return the exit status: 1 if --compare found a regression, else 0.
+    """
+    if importlib.util.find_spec('numpy') is not None:
+        default_generators = ARRIVAL_GENERATORS
+    else:
+        default_generators = [generator for generator in ARRIVAL_GENERATORS
+                              if generator not in NUMPY_GENERATORS]
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[2])
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES),
+                        default=list(SIZES))
+    parser.add_argument('--algorithms', nargs='+', choices=MOVING_ALGORITHMS,
+                        default=MOVING_ALGORITHMS)
+    parser.add_argument('--generators', nargs='+', choices=ARRIVAL_GENERATORS,
+                        default=default_generators)
+    parser.add_argument('--repeats', type=int, default=3,
+                        help='the number of timed runs of each case '
+                             '(default: %(default)s)')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='skip the peak memory runs')
+    parser.add_argument('--baseline', default=BASELINE,
+                        help='the baseline file (default: %(default)s)')
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument('--save', action='store_true',
+                        help='save the results as the baseline')
+    action.add_argument('--compare', action='store_true',
+                        help='compare the results with the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='the fraction by which a case may be slower or '
+                             'use more memory before --compare reports it '
+                             '(default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.sizes, args.algorithms, args.generators,
+                        args.repeats, not args.no_memory)
+    if args.save:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as baseline_file:
+                baseline = json.load(baseline_file)
+        baseline.update(results)
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+        print(f'saved {len(results)} results to {args.baseline}')
+    elif args.compare:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,76 @@
+"""CSC148 Assignment 1 - Startup benchmark
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module description ===
+This script measures how long it takes to import the simulation module and to
+build a Simulation, both headless (visualize=False) and visualized
+(visualize=True).
+
+Each measurement runs in a fresh Python process, so module imports are not
+shared between repeats. Visualized runs use SDL's dummy video driver, so no
+window is opened.
+
+Run it from this directory:
+    python bench_startup.py [repeats]
+"""
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+# The code timed in each child process. It prints the two timings (import,
+# then construction) in seconds, separated by a space.
+_CHILD = '''
+import time
+start = time.perf_counter()
+import simulation
+import algorithms
+imported = time.perf_counter()
+sim = simulation.Simulation({{
+    'num_floors': 5,
+    'num_elevators': 2,
+    'elevator_capacity': 4,
+    'num_people_per_round': 2,
+    'arrival_generator': algorithms.FileArrivals(5, 'sample_arrivals.csv'),
+    'moving_algorithm': algorithms.PushyPassenger(),
+    'visualize': {visualize}
+}})
+built = time.perf_counter()
+print(imported - start, built - imported)
+'''
+
+
+def time_startup(visualize: bool, repeats: int) -> Dict[str, List[float]]:
+    """Return the import and construction times of <repeats> fresh processes.
+    """
+    env = dict(os.environ, SDL_VIDEODRIVER='dummy', SDL_AUDIODRIVER='dummy',
+               PYGAME_HIDE_SUPPORT_PROMPT='1')
+    here = os.path.dirname(os.path.abspath(__file__))
+    times = {'import': [], 'build': []}
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, '-c', _CHILD.format(visualize=visualize)],
+            cwd=here, env=env, check=True, capture_output=True, text=True
+        ).stdout.split()
+        times['import'].append(float(output[-2]))
+        times['build'].append(float(output[-1]))
+    return times
+
+
+def main(repeats: int) -> None:
+    """Print the median startup times for both modes."""
+    print(f'{"mode":<10} {"import simulation":>18} {"build Simulation":>18}')
+    for visualize in (False, True):
+        times = time_startup(visualize, repeats)
+        mode = 'visual' if visualize else 'headless'
+        print(f'{mode:<10} '
+              f'{statistics.median(times["import"]) * 1000:>15.1f} ms '
+              f'{statistics.median(times["build"]) * 1000:>15.1f} ms')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
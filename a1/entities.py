@@ -20,29 +20,66 @@ in sprites.py; this is to enable their instances to be visualized properly.
 You may not change sprites.py, but are responsible for reading the documentation
 to understand these classes, as well as the abstract methods your classes must
 implement.
+
+HeadlessPerson and HeadlessElevator hold the simulation state of people and
+elevators, and Person and Elevator add the sprites on top of them. Person and
+Elevator live in sprite_entities.py, so that importing this module does not
+import Pygame; they are still available as entities.Person and
+entities.Elevator.
 """
 from __future__ import annotations
-from typing import List
-from sprites import PersonSprite, ElevatorSprite
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+from stats import TripStats
+
+
+class RoundClock:
+    """The number of simulation rounds that have finished.
+
+    A simulation shares one clock with every person in it, so that a person's
+    wait time can be worked out from the round they arrived in instead of
+    being counted up every round.
+
+    === Attributes ===
+    now: the number of rounds that have finished
+
+    === Representation invariants ===
+    now >= 0
+    """
+    now: int
+
+    def __init__(self) -> None:
+        """Initialize a new clock at round 0."""
+        self.now = 0
 
 
-class Elevator(ElevatorSprite):
-    """An elevator in the elevator simulation.
+class HeadlessElevator:
+    """An elevator in the elevator simulation, without any Pygame state.
 
-    Remember to add additional documentation to this class docstring
-    as you add new attributes (and representation invariants).
+    This class carries only the simulation state of an elevator, so runs that
+    are not visualized never create Pygame surfaces. The sprite-backed
+    Elevator below adds the drawing behaviour on top of it.
 
     === Attributes ===
-    passengers: A list of the people currently on this elevator
+    passengers: A list of the people currently on this elevator, in the order
+                they boarded
     max_capacity: The maximum number of people that can board on this elevator
     current_floor: The current floor that this elevator is at.
+    direction: The direction of this elevator's last move: 1 if it went up,
+               -1 if it went down, and 0 if it stayed still or has not moved
+    _by_target: The people in passengers, grouped by their target floor
     === Representation invariants ===
     max_capacity >= 1
+    _by_target[floor] contains exactly the passengers whose target is <floor>,
+    in the order they boarded, and has no empty lists.
 
     """
-    passengers: List[Person]
+    passengers: List[HeadlessPerson]
     max_capacity: int
     current_floor: int
+    direction: int
+    _by_target: Dict[int, List[HeadlessPerson]]
 
     def __init__(self, max_capacity: int) -> None:
         """
@@ -50,10 +87,11 @@ class Elevator(ElevatorSprite):
 
         Precondition: max_capacity >= 1
         """
-        ElevatorSprite.__init__(self)
         self.max_capacity = max_capacity
         self.passengers = []
         self.current_floor = 1
+        self.direction = 0
+        self._by_target = {}
 
     def fullness(self) -> float:
         """Return the fraction that this elevator is filled.
@@ -63,11 +101,17 @@ class Elevator(ElevatorSprite):
         """
         return len(self.passengers) / self.max_capacity
 
-    def get_passengers(self) -> List[Person]:
+    def get_passengers(self) -> List[HeadlessPerson]:
         """Return the list of Person who is in this elevator.
         """
         return self.passengers
 
+    def get_target_floors(self) -> List[int]:
+        """Return the distinct target floors of the passengers in this
+        elevator, in no particular order.
+        """
+        return list(self._by_target)
+
     def get_current_floor(self) -> int:
         """Return the current floor of this elevator.
         """
@@ -77,29 +121,96 @@ class Elevator(ElevatorSprite):
         """Change the current floor of this elevator to another floor <move>.
         """
         self.current_floor += move
+        self.direction = (move > 0) - (move < 0)
+
+    def board(self, people: List[HeadlessPerson]) -> None:
+        """Add <people> to the passengers of this elevator, in order.
 
-    def person_disembark(self, person: Person) -> None:
+        Precondition: len(self.passengers) + len(people) <= self.max_capacity
+        """
+        self.passengers.extend(people)
+        for person in people:
+            self._by_target.setdefault(person.target, []).append(person)
+
+    def person_disembark(self, person: HeadlessPerson) -> None:
         """Remove this person <person> from the passenger list of this elevator.
         """
         self.passengers.remove(person)
+        same_target = self._by_target[person.target]
+        same_target.remove(person)
+        if not same_target:
+            del self._by_target[person.target]
+
+    def disembark_at(self, floor: int) -> List[HeadlessPerson]:
+        """Remove and return every passenger whose target is <floor>, in the
+        order they boarded.
+
+        This does no work beyond a dictionary lookup when nobody on this
+        elevator is going to <floor>.
+        """
+        leaving = self._by_target.pop(floor, None)
+        if leaving is None:
+            return []
+        if len(leaving) == len(self.passengers):
+            self.passengers.clear()
+        else:
+            self.passengers[:] = [person for person in self.passengers
+                                  if person.target != floor]
+        return leaving
+
 
+class HeadlessPerson:
+    """A person in the elevator simulation, without any Pygame state.
 
-class Person(PersonSprite):
-    """A person in the elevator simulation.
+    A person's wait time is not stored, but worked out from the round they
+    arrived in and the round they reached their target floor (or the current
+    round of the clock they were given, if they have not reached it yet).
+
+    Attributes are kept in __slots__, so a headless person has no instance
+    dictionary. The sprite-backed Person still has one, for its sprite state.
 
     === Attributes ===
-    start: the floor this person started on
-    target: the floor this person wants to go to
+    start: the floor this person started their trip on, which does not
+           change when a later leg of a trip with transfers starts at a
+           transfer floor
+    target: the floor this person wants to go to, or, on a trip with
+            transfers, the floor where the current leg of the trip ends
+    final_target: the floor this person wants to go to in the end
     wait_time: the number of rounds this person has been waiting
+    arrival_round: the clock round this person arrived in
+    boarded_round: the clock round this person first boarded an elevator,
+                   or None if they have not boarded one yet
+    queued_round: the clock round this person started waiting for an
+                  elevator for the current leg of their trip
+    queue_time: the number of rounds this person waited for an elevator on
+                the legs of their trip they have boarded for
+    completion_round: the clock round this person reached their target floor,
+                      or None if they have not reached it yet
+    _clock: the clock of the simulation this person arrived in, or None if
+            they have not arrived in a simulation
+    _extra_wait: the number of rounds added to this person's wait time by
+                 calls to wait
 
     === Representation invariants ===
     start >= 1
     target >= 1
     wait_time >= 0
+    queue_time >= 0
+    _extra_wait >= 0
     """
+    __slots__ = ('start', 'target', 'final_target', 'arrival_round',
+                 'boarded_round', 'queued_round', 'queue_time',
+                 'completion_round', '_clock', '_extra_wait')
     start: int
     target: int
-    wait_time: int
+    final_target: int
+    arrival_round: int
+    boarded_round: Optional[int]
+    queued_round: int
+    queue_time: int
+    completion_round: Optional[int]
+    _clock: Optional[RoundClock]
+    _extra_wait: int
 
     def __init__(self, start: int, target: int) -> None:
         """
@@ -107,14 +218,66 @@ class Person(PersonSprite):
         """
         self.start = start
         self.target = target
-        self.wait_time = 0
-        PersonSprite.__init__(self)
+        self.final_target = target
+        self.arrival_round = 0
+        self.boarded_round = None
+        self.queued_round = 0
+        self.queue_time = 0
+        self.completion_round = None
+        self._clock = None
+        self._extra_wait = 0
+
+    @property
+    def wait_time(self) -> int:
+        """The number of rounds this person has been waiting."""
+        return self.get_wait_time()
+
+    def arrive(self, clock: RoundClock) -> None:
+        """Record that this person arrives in the simulation with <clock>, in
+        the current round of that clock.
+        """
+        self._clock = clock
+        self.arrival_round = clock.now
+        self.queued_round = clock.now
+
+    def board(self) -> None:
+        """Record that this person boards an elevator in the current round of
+        their clock, adding the rounds they waited for it to their queue time.
+
+        Precondition: this person has arrived in a simulation.
+        """
+        now = self._clock.now
+        self.queue_time += now - self.queued_round
+        if self.boarded_round is None:
+            self.boarded_round = now
+
+    def transfer(self) -> None:
+        """Record that this person gets off at a transfer floor in the
+        current round of their clock, and starts waiting there for the
+        elevator of the next leg of their trip.
+
+        Precondition: this person has arrived in a simulation.
+        """
+        self.queued_round = self._clock.now
+
+    def complete(self) -> None:
+        """Record that this person reaches their target floor in the current
+        round of their clock.
+
+        Precondition: this person has arrived in a simulation.
+        """
+        self.completion_round = self._clock.now
 
     def wait(self) -> None:
         """
-        Increase this person's wait time (for each round).
+        Increase this person's wait time by one round.
+
+        The simulation does not need to call this, since wait times follow
+        from the clock. The extra round is only added to what get_wait_time
+        returns; the recorded arrival round, which the trip statistics are
+        worked out from, does not change.
         """
-        self.wait_time += 1
+        self._extra_wait += 1
 
     def get_anger_level(self) -> int:
         """Return this person's anger level.
@@ -127,13 +290,14 @@ class Person(PersonSprite):
             - Level 3: waiting 7-8 rounds
             - Level 4: waiting >= 9 rounds
         """
-        if 0 <= self.wait_time <= 2:
+        wait_time = self.get_wait_time()
+        if 0 <= wait_time <= 2:
             return 0
-        elif 3 <= self.wait_time <= 4:
+        elif 3 <= wait_time <= 4:
             return 1
-        elif 5 <= self.wait_time <= 6:
+        elif 5 <= wait_time <= 6:
             return 2
-        elif 7 <= self.wait_time <= 8:
+        elif 7 <= wait_time <= 8:
             return 3
         else:
             return 4
@@ -151,12 +315,106 @@ class Person(PersonSprite):
     def get_wait_time(self) -> int:
         """Return the wait time of this person.
         """
-        return self.wait_time
+        if self.completion_round is not None:
+            waited = self.completion_round - self.arrival_round
+        elif self._clock is not None:
+            waited = self._clock.now - self.arrival_round
+        else:
+            waited = 0
+        return waited + self._extra_wait
+
+
+class CompletedPeople:
+    """A record of the people who reached their target floor.
+
+    The times of their trips always go into running statistics, which take
+    the same amount of memory however many people are added. The trips
+    themselves are only kept if asked for, as one compact array for each
+    number that describes a trip. Either way, the people themselves (and,
+    when visualized, their sprites) can be freed as soon as they leave their
+    elevator.
+
+    === Attributes ===
+    stats: the statistics of the trip times
+    keep_trips: whether the arrays below are filled in
+    starts: the start floor of each person
+    targets: the target floor of each person
+    arrival_rounds: the round each person arrived in
+    boarded_rounds: the round each person first boarded an elevator
+    queue_times: the number of rounds each person waited for an elevator
+    completion_rounds: the round each person reached their target floor
+
+    === Representation invariants ===
+    The six arrays have the same length, and their i-th entries belong to
+    the same person, in the order the people were added.
+    The arrays are empty if keep_trips is False.
+    """
+    stats: TripStats
+    keep_trips: bool
+    starts: array
+    targets: array
+    arrival_rounds: array
+    boarded_rounds: array
+    queue_times: array
+    completion_rounds: array
+
+    def __init__(self, keep_trips: bool = False) -> None:
+        """Initialize an empty record, which keeps every trip if
+        <keep_trips> is True.
+        """
+        self.stats = TripStats()
+        self.keep_trips = keep_trips
+        self.starts = array('i')
+        self.targets = array('i')
+        self.arrival_rounds = array('i')
+        self.boarded_rounds = array('i')
+        self.queue_times = array('i')
+        self.completion_rounds = array('i')
+
+    def __len__(self) -> int:
+        """Return the number of people recorded."""
+        return self.stats.wait.running.count
+
+    def add(self, people: Iterable[HeadlessPerson]) -> None:
+        """Record <people>, who have all reached their target floor.
+
+        Precondition: every person in <people> has boarded an elevator and
+        completed their trip.
+        """
+        for person in people:
+            self.stats.add(person.arrival_round, person.queue_time,
+                           person.completion_round)
+            if self.keep_trips:
+                self.starts.append(person.start)
+                self.targets.append(person.target)
+                self.arrival_rounds.append(person.arrival_round)
+                self.boarded_rounds.append(person.boarded_round)
+                self.queue_times.append(person.queue_time)
+                self.completion_rounds.append(person.completion_round)
+
+    def wait_times(self) -> List[int]:
+        """Return the wait time of each kept trip, in the order they were
+        added.
+        """
+        return [completion - arrival for completion, arrival
+                in zip(self.completion_rounds, self.arrival_rounds)]
+
+
+def __getattr__(name: str) -> type:
+    """Return the sprite-backed Elevator or Person class.
+
+    These live in sprite_entities, which imports Pygame, so they are only
+    loaded when someone actually asks for them.
+    """
+    if name in ('Elevator', 'Person'):
+        import sprite_entities
+        return getattr(sprite_entities, name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
 if __name__ == '__main__':
     import python_ta
     python_ta.check_all(config={
-        'extra-imports': ['sprites'],
+        'extra-imports': ['array', 'sprite_entities', 'stats'],
         'max-nested-blocks': 4
     })
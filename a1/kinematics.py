@@ -0,0 +1,211 @@
+"""CSC148 Assignment 1 - Elevator Kinematics
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module description ===
+This module contains the optional travel model of the simulation. By
+default, an elevator moves one floor every round and people board and leave
+instantly. When config['kinematics'] is set, each round instead stands for
+config['round_seconds'] seconds, and elevators take as long as their speed,
+acceleration and doors allow.
+
+CarKinematics describes how one elevator moves. KinematicModel keeps track
+of when each elevator of a simulation is next free to board, leave or move.
+"""
+import math
+from typing import Any, List, Tuple
+
+
+class CarKinematics:
+    """How fast an elevator travels, and how long it stays at a stop.
+
+    An elevator accelerates up to max_speed, and slows down at the same rate,
+    so a trip of a few floors may never reach max_speed. An acceleration of
+    math.inf makes it travel at max_speed all the way.
+
+    === Attributes ===
+    floor_height: the distance between two floors, in metres
+    max_speed: the top speed of the elevator, in metres per second
+    acceleration: how fast the elevator speeds up and slows down, in metres
+                  per second squared
+    door_time: the time to open and close the doors at a stop, in seconds
+    board_time: the time each person takes to board or leave, in seconds
+
+    === Representation invariants ===
+    floor_height > 0, max_speed > 0 and acceleration > 0
+    door_time >= 0 and board_time >= 0
+    """
+    floor_height: float
+    max_speed: float
+    acceleration: float
+    door_time: float
+    board_time: float
+
+    def __init__(self, floor_height: float = 3.0, max_speed: float = 2.0,
+                 acceleration: float = 1.0, door_time: float = 4.0,
+                 board_time: float = 1.0) -> None:
+        """Initialize the kinematics of an elevator.
+
+        Preconditions:
+            floor_height > 0, max_speed > 0 and acceleration > 0
+            door_time >= 0 and board_time >= 0
+        """
+        self.floor_height = floor_height
+        self.max_speed = max_speed
+        self.acceleration = acceleration
+        self.door_time = door_time
+        self.board_time = board_time
+
+    def travel_time(self, floors: int) -> float:
+        """Return the time in seconds to travel <floors> floors, from
+        standing still to standing still.
+
+        Precondition: floors >= 0
+        """
+        distance = floors * self.floor_height
+        # The distance covered while speeding up to max_speed and slowing
+        # back down.
+        ramp = self.max_speed ** 2 / self.acceleration
+        if distance >= ramp:
+            return (distance / self.max_speed +
+                    self.max_speed / self.acceleration)
+        return 2 * math.sqrt(distance / self.acceleration)
+
+
+class KinematicModel:
+    """The motion of the elevators of a simulation, on a clock that advances
+    round_seconds seconds each round.
+
+    An elevator is ready when it has finished its last move or stop. Only a
+    ready elevator lets people leave or board, and only a ready elevator
+    follows the moving algorithm; the others carry on with what they are
+    doing.
+
+    An elevator that keeps moving the same way without stopping only slows
+    down once, at the end, so each floor of a run takes the extra time that
+    floor adds to the whole run.
+
+    === Attributes ===
+    cars: the kinematics of each elevator
+    round_seconds: the number of seconds each round stands for
+    ready: whether each elevator was ready at the start of the current round
+
+    === Private Attributes ===
+    _now: the time of the current round, in seconds
+    _busy_until: the time each elevator finishes its last move or stop, in
+                 seconds
+    _run_floors: the number of floors each elevator has moved since it last
+                 stood still
+    _doors_open: whether each elevator has its doors open, having stopped and
+                 not moved since
+    _floor_times: for each elevator, the time its (k + 1)-th floor of a run
+                  adds to the run, at index k
+
+    === Representation invariants ===
+    round_seconds > 0
+    All of the lists of elevators have the same length as cars.
+    """
+    cars: List[CarKinematics]
+    round_seconds: float
+    ready: List[bool]
+    _now: float
+    _busy_until: List[float]
+    _run_floors: List[int]
+    _doors_open: List[bool]
+    _floor_times: List[List[float]]
+
+    def __init__(self, cars: List[CarKinematics], num_floors: int,
+                 round_seconds: float = 1.0) -> None:
+        """Initialize the motion of elevators with the kinematics <cars>,
+        standing still with their doors closed, in a building with
+        <num_floors> floors.
+
+        Precondition: round_seconds > 0 and num_floors >= 1
+        """
+        self.cars = cars
+        self.round_seconds = round_seconds
+        self.ready = [True] * len(cars)
+        self._now = 0.0
+        self._busy_until = [0.0] * len(cars)
+        self._run_floors = [0] * len(cars)
+        self._doors_open = [False] * len(cars)
+        self._floor_times = []
+        for car in cars:
+            run_times = [car.travel_time(floors)
+                         for floors in range(num_floors + 1)]
+            self._floor_times.append([run_times[k + 1] - run_times[k]
+                                      for k in range(num_floors)])
+
+    def start_round(self, round_num: int) -> List[bool]:
+        """Move the clock to the round <round_num>, and return whether each
+        elevator is ready in it.
+        """
+        self._now = round_num * self.round_seconds
+        self.ready = [self.is_free(index) for index in range(len(self.cars))]
+        return self.ready
+
+    def is_free(self, index: int) -> bool:
+        """Return whether the elevator at <index> has finished its last move
+        or stop by the time of the current round.
+        """
+        # Allow for rounding errors in the sums of times.
+        return self._busy_until[index] <= self._now + 1e-9
+
+    def stop(self, index: int, people: int) -> None:
+        """Keep the elevator at <index> at its floor while <people> more
+        people leave or board it, opening its doors if they are closed.
+        """
+        if people == 0:
+            return
+        car = self.cars[index]
+        dwell = car.board_time * people
+        if not self._doors_open[index]:
+            dwell += car.door_time
+        self._busy_until[index] = max(self._busy_until[index],
+                                      self._now) + dwell
+        self._run_floors[index] = 0
+        self._doors_open[index] = True
+
+    def move(self, index: int, move: int, last_move: int) -> None:
+        """Start moving the elevator at <index> by <move> floors, 1, -1 or 0,
+        given that its last move was <last_move>.
+
+        Precondition: the elevator at <index> is free.
+        """
+        if move == 0:
+            self._run_floors[index] = 0
+            return
+        run = self._run_floors[index]
+        if run > 0 and move == last_move:
+            # The elevator did not stop, so its run carries on from where
+            # its last floor ended.
+            start = self._busy_until[index]
+        else:
+            run = 0
+            start = self._now
+        self._busy_until[index] = start + self._floor_times[index][run]
+        self._run_floors[index] = run + 1
+        self._doors_open[index] = False
+
+    def get_state(self) -> Tuple[Any, ...]:
+        """Return the motion of the elevators, to save in a snapshot."""
+        return (self._now, list(self.ready), list(self._busy_until),
+                list(self._run_floors), list(self._doors_open))
+
+    def set_state(self, state: Tuple[Any, ...]) -> None:
+        """Restore the motion of the elevators returned by get_state."""
+        now, ready, busy_until, run_floors, doors_open = state
+        self._now = now
+        self.ready = list(ready)
+        self._busy_until = list(busy_until)
+        self._run_floors = list(run_floors)
+        self._doors_open = list(doors_open)
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['math']
+    })
@@ -0,0 +1,76 @@
+"""CSC148 Assignment 1 - Stage Profiling
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module description ===
+This module contains StageProfiler, which records how many times each stage
+of a simulation round is called and how much wall time it takes.
+
+A simulation only uses a profiler when config['profile'] is True. It then
+replaces each stage with a timed wrapper once, when it is created, so an
+unprofiled simulation runs exactly the same code as before.
+"""
+import time
+from typing import Any, Callable, Dict
+
+
+class StageProfiler:
+    """The call counts and wall times of named stages.
+
+    A stage that calls another timed stage includes the time of that stage
+    in its own.
+
+    === Attributes ===
+    calls: maps each stage name to the number of times it was called
+    seconds: maps each stage name to the total wall time of its calls, in
+             seconds
+    """
+    calls: Dict[str, int]
+    seconds: Dict[str, float]
+
+    def __init__(self) -> None:
+        """Initialize a profiler that has not timed anything."""
+        self.calls = {}
+        self.seconds = {}
+
+    def wrap(self, name: str, function: Callable) -> Callable:
+        """Return a function that calls <function> with the same arguments,
+        and records the call and its wall time under the stage <name>.
+        """
+        calls = self.calls
+        seconds = self.seconds
+        calls.setdefault(name, 0)
+        seconds.setdefault(name, 0.0)
+        clock = time.perf_counter
+
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                seconds[name] += clock() - start
+                calls[name] += 1
+        return timed
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Return the call count, total time and mean time per call of each
+        stage that was called, slowest stage first.
+
+        Times are in seconds.
+        """
+        stages = sorted((name for name in self.calls if self.calls[name]),
+                        key=self.seconds.get, reverse=True)
+        return {name: {'calls': self.calls[name],
+                       'seconds': self.seconds[name],
+                       'seconds_per_call': self.seconds[name] /
+                       self.calls[name]}
+                for name in stages}
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['time']
+    })
@@ -8,24 +8,75 @@ University of Toronto
 This contains the main Simulation class that is actually responsible for
 creating and running the simulation. You'll also find the function `sample_run`
 here at the bottom of the file, which you can use as a starting point to run
-your simulation on a small configuration.
+your simulation on a small configuration, and the function `sweep`, which runs
+a simulation for every combination of a grid of configuration values in
+parallel.
 
 Note that we have provided a fairly comprehensive list of attributes for
 Simulation already. You may add your own *private* attributes, but should not
 remove any of the existing attributes.
 """
-# You may import more things from these modules (e.g., additional types from
-# typing), but you may not import from any other modules.
-from typing import Dict, List, Any
+import copy
+import itertools
+import multiprocessing
+import os
+import pickle
+import random
+from typing import (Callable, Dict, Iterator, List, Any, Optional, Tuple,
+                    Union)
 
 import algorithms
-from entities import Person, Elevator
+from entities import (CompletedPeople, HeadlessPerson, HeadlessElevator,
+                      RoundClock)
+from kinematics import CarKinematics, KinematicModel
+from profiling import StageProfiler
+from stats import TripStats
 from visualizer import Visualizer
+from waiting import DOWN, UP, WaitingQueues
+from zones import BuildingLayout, ZonedDispatch, ZonedQueues
 
 
 class Simulation:
     """The main simulation class.
 
+    When config['visualize'] is False, the simulation uses HeadlessElevator
+    and HeadlessPerson, so no Pygame surfaces are created for its entities.
+
+    The optional config['engine'] chooses how rounds are run. With 'round'
+    (the default) every round goes through all four stages. With 'event', a
+    simulation that is not visualized jumps over rounds in which nobody
+    arrives, boards or leaves, as long as its moving algorithm holds its
+    course (see MovingAlgorithm). Both engines give the same statistics.
+
+    If the optional config['record_trips'] is True, the start and target
+    floors and the rounds of every finished trip are kept in
+    people_completed. Otherwise only statistics of the trip times are kept,
+    so memory does not grow with the number of people who finish.
+
+    If the optional config['profile'] is True, the call counts and wall times
+    of each stage of a round, of the visualizer and of the moving algorithm
+    are recorded, and run reports them under 'profile' (see
+    StageProfiler.summary). Otherwise nothing is timed.
+
+    The whole state of a simulation can be saved with snapshot and put back
+    with restore, and run carries on from the round the simulation is in. If
+    the optional config['checkpoint_file'] is set, run also saves a snapshot
+    to that file every config['checkpoint_every'] rounds (default 1000),
+    which load_checkpoint reads back.
+
+    If the optional config['kinematics'] is set, to a CarKinematics or a
+    list of one for each elevator, elevators move and stop as fast as their
+    kinematics allow (see KinematicModel), and each round stands for
+    config['round_seconds'] seconds (default 1), so wait times are counted in
+    those rounds. Such a simulation always uses the 'round' engine.
+
+    If the optional config['served_floors'] is set, to a list holding the
+    floors each elevator stops at, people whose start and target floors no
+    elevator serves together travel in legs, and wait again for another
+    elevator at each transfer floor (see BuildingLayout). Their wait time runs
+    from their arrival to the end of their last leg. Such a simulation also
+    always uses the 'round' engine.
+
     === Attributes ===
     arrival_generator: the algorithm used to generate new arrivals.
     elevators: a list of the elevators in the simulation
@@ -33,20 +84,49 @@ class Simulation:
     num_floors: the number of floors
     visualizer: the Pygame visualizer used to visualize this simulation
     waiting: a dictionary of people waiting for an elevator
-             (keys are floor numbers, values are the list of waiting people)
+             (keys are floor numbers, values are the queues of waiting people
+             going up and down), or the ZonedQueues of a zoned building
     num_round: the number of simulation rounds
     total_people: the total number of persons generated during this simulation
-    people_completed: a list of people arriving target floor
+    people_completed: a record of the people who reached their target floor;
+                      the people themselves are not kept
+    _skip_idle_rounds: whether to use the event engine to skip rounds
+    _layout: the floors each elevator serves and the routes between them,
+             or None if every elevator serves every floor
+    _dispatcher: the algorithm that moves the elevators, which is
+                 moving_algorithm, or a ZonedDispatch of it if there is a
+                 layout
+    _choose_directions: the move_elevators method of the dispatcher, timed if
+                        this simulation is profiled
+    _profiler: the profiler timing the stages of this simulation, or None if
+               it is not profiled
+    _checkpoint_file: the file run saves snapshots to, or None
+    _checkpoint_every: the number of rounds between snapshots saved by run
+    _motion: the travel model of the elevators, or None if they move one
+             floor every round and stop for no time
+    _clock: the clock shared with every person in this simulation, which
+            always reads num_round
     """
     arrival_generator: algorithms.ArrivalGenerator
-    elevators: List[Elevator]
+    elevators: List[HeadlessElevator]
     moving_algorithm: algorithms.MovingAlgorithm
     num_floors: int
     visualizer: Visualizer
-    waiting: Dict[int, List[Person]]
+    waiting: Union[WaitingQueues, ZonedQueues]
     num_round: int
     total_people: int
-    people_completed: List[Person]
+    people_completed: CompletedPeople
+    _skip_idle_rounds: bool
+    _layout: Optional[BuildingLayout]
+    _dispatcher: algorithms.MovingAlgorithm
+    _choose_directions: Callable[[List[HeadlessElevator],
+                                  Dict[int, List[HeadlessPerson]], int],
+                                 List[algorithms.Direction]]
+    _profiler: Optional[StageProfiler]
+    _checkpoint_file: Optional[str]
+    _checkpoint_every: int
+    _motion: Optional[KinematicModel]
+    _clock: RoundClock
 
     def __init__(self,
                  config: Dict[str, Any]) -> None:
@@ -56,20 +136,39 @@ class Simulation:
         'num_people_per_round': 2,
     }
         """
+        if config['visualize']:
+            # Only visualized runs pay for importing Pygame.
+            from sprite_entities import Elevator, Person
+            elevator_type, person_type = Elevator, Person
+        else:
+            elevator_type, person_type = HeadlessElevator, HeadlessPerson
+
         self.arrival_generator = config['arrival_generator']
+        self.arrival_generator.person_type = person_type
 
         self.elevators = []
         for i in range(config['num_elevators']):
-            new_elevator = Elevator(config['elevator_capacity'])
+            new_elevator = elevator_type(config['elevator_capacity'])
             self.elevators.append(new_elevator)
 
         self.moving_algorithm = config['moving_algorithm']
 
         self.num_floors = config['num_floors']
 
-        self.waiting = {}
-        for i in range(1, config['num_floors'] + 1):
-            self.waiting[i] = []
+        self._layout = None
+        if config.get('served_floors') is not None:
+            if len(config['served_floors']) != len(self.elevators):
+                raise ValueError('served_floors must list the floors of '
+                                 'every elevator')
+            self._layout = BuildingLayout(self.num_floors,
+                                          config['served_floors'])
+            # Each elevator starts at the lowest floor of its zone, rather
+            # than at floor 1, which it may not serve.
+            for index, elevator in enumerate(self.elevators):
+                elevator.current_floor = self._layout.served_range(index)[0]
+            self._leave = self._leave_zoned
+            self._board = self._board_zoned
+        self.waiting = self._empty_waiting()
 
         # Initialize the visualizer.
         # Note that this should be called *after* the other attributes
@@ -79,23 +178,71 @@ class Simulation:
                                      config['visualize'])
         self.num_round = 0
         self.total_people = 0
-        self.people_completed = []
+        self.people_completed = CompletedPeople(
+            config.get('record_trips', False))
+        self._skip_idle_rounds = (config.get('engine', 'round') == 'event' and
+                                  not config['visualize'] and
+                                  self._layout is None)
+        self._clock = RoundClock()
+
+        self._motion = None
+        cars = config.get('kinematics')
+        if cars is not None:
+            if isinstance(cars, CarKinematics):
+                cars = [cars] * len(self.elevators)
+            self._motion = KinematicModel(cars, self.num_floors,
+                                          config.get('round_seconds', 1.0))
+            self._skip_idle_rounds = False
+            # Simulations without kinematics keep running the plain stages.
+            self._handle_leaving = self._handle_leaving_kinematic
+            self._handle_boarding = self._handle_boarding_kinematic
+            self._move_elevators = self._move_elevators_kinematic
+
+        self._profiler = None
+        self.set_moving_algorithm(self.moving_algorithm)
+        if config.get('profile', False):
+            self._profile()
+
+        self._checkpoint_file = config.get('checkpoint_file')
+        self._checkpoint_every = config.get('checkpoint_every', 1000)
 
     ############################################################################
     # Handle rounds of simulation.
     ############################################################################
     def run(self, num_rounds: int) -> Dict[str, Any]:
-        """Run the simulation for the given number of rounds.
-
-        Return a set of statistics for this simulation run, as specified in the
+        """Run the simulation until round <num_rounds>, and return a set of
+        statistics for the whole simulation so far, as specified in the
         assignment handout.
 
-        Precondition: num_rounds >= 1.
+        A new simulation starts from round 0, with no people and all of its
+        elevators empty at floor 1, so it runs for <num_rounds> rounds. A
+        simulation that has already been run, or that was restored from a
+        snapshot, carries on from the round it stopped in.
 
-        Note: each run of the simulation starts from the same initial state
-        (no people, all elevators are empty and start at floor 1).
+        Raise ValueError if the simulation has already reached round
+        <num_rounds>.
         """
-        for i in range(num_rounds):
+        if num_rounds <= self.num_round:
+            raise ValueError(f'the simulation is already at round '
+                             f'{self.num_round}, so it cannot run until round '
+                             f'{num_rounds}')
+        try:
+            self._run_rounds(num_rounds)
+        finally:
+            # A generator reading its file as the rounds go by must not keep
+            # it open between runs, or after a run that failed.
+            self.arrival_generator.release_files()
+
+        stats = self._calculate_stats()
+        if self._profiler is not None:
+            stats['profile'] = self._profiler.summary()
+        return stats
+
+    def _run_rounds(self, num_rounds: int) -> None:
+        """Run rounds of the simulation until round <num_rounds>."""
+        i = self.num_round
+        next_checkpoint = i + self._checkpoint_every
+        while i < num_rounds:
             self.visualizer.render_header(i)
 
             # Stage 1: generate new arrivals
@@ -113,7 +260,86 @@ class Simulation:
             # Pause for 1 second
             self.visualizer.wait(1)
 
-        return self._calculate_stats()
+            i += 1
+            if self._skip_idle_rounds:
+                i += self._skip_rounds(i, num_rounds)
+            if self._checkpoint_file is not None and i >= next_checkpoint:
+                self.save_checkpoint(self._checkpoint_file)
+                next_checkpoint = i + self._checkpoint_every
+
+    def set_moving_algorithm(self, moving_algorithm: algorithms.MovingAlgorithm
+                             ) -> None:
+        """Use <moving_algorithm> to move the elevators from now on."""
+        self.moving_algorithm = moving_algorithm
+        self._dispatcher = moving_algorithm
+        if self._layout is not None:
+            self._dispatcher = ZonedDispatch(moving_algorithm, self._layout)
+        self._choose_directions = self._dispatcher.move_elevators
+        if self._profiler is not None:
+            name = type(moving_algorithm).__name__
+            self._choose_directions = self._profiler.wrap(
+                f'{name}.move_elevators', self._choose_directions)
+
+    def _profile(self) -> None:
+        """Start profiling this simulation, by replacing its stages, the
+        visualizer calls made every round and its moving algorithm with timed
+        versions.
+        """
+        self._profiler = StageProfiler()
+        for stage in ['_generate_arrivals', '_handle_leaving',
+                      '_handle_boarding', '_move_elevators', '_skip_rounds']:
+            setattr(self, stage,
+                    self._profiler.wrap(stage[1:], getattr(self, stage)))
+        for call in ['render_header', 'wait']:
+            setattr(self.visualizer, call,
+                    self._profiler.wrap(f'visualizer.{call}',
+                                        getattr(self.visualizer, call)))
+        self.set_moving_algorithm(self.moving_algorithm)
+
+    def _skip_rounds(self, round_num: int, end_round: int) -> int:
+        """Jump over the rounds from <round_num> on in which nobody arrives,
+        boards or leaves, stopping before <end_round>, and return the number of
+        rounds skipped.
+
+        While nobody is waiting, an algorithm that holds its course moves each
+        elevator with passengers straight towards a target floor and keeps the
+        others still, so the skipped rounds only move those elevators. The
+        algorithm is asked for directions once, for all of the skipped rounds.
+        """
+        if (not self.moving_algorithm.holds_course or
+                self.waiting.lowest_floor() is not None):
+            return 0
+
+        next_arrival = self.arrival_generator.next_arrival_round(round_num)
+        if next_arrival is None or next_arrival > end_round:
+            next_arrival = end_round
+        skip = next_arrival - round_num
+        if skip <= 0:
+            return 0
+
+        # Asking for directions may change the algorithm's state, which
+        # would be wrong if no rounds end up being skipped.
+        state = self._dispatcher.get_state()
+        direction_list = self._choose_directions(self.elevators, self.waiting,
+                                                 self.num_floors)
+        for elevator, direction in zip(self.elevators, direction_list):
+            if direction == algorithms.Direction.STAY:
+                if elevator.passengers:
+                    skip = 0
+                continue
+            distances = [(target - elevator.current_floor) * direction.value
+                         for target in elevator.get_target_floors()]
+            ahead = [distance for distance in distances if distance >= 0]
+            skip = min(skip, min(ahead, default=0))
+
+        if skip <= 0:
+            self._dispatcher.set_state(state)
+            return 0
+        for elevator, direction in zip(self.elevators, direction_list):
+            elevator.set_current_floor(direction.value * skip)
+        self.num_round += skip
+        self._clock.now = self.num_round
+        return skip
 
     def _generate_arrivals(self, round_num: int) -> None:
         """Generate and visualize new arrivals."""
@@ -121,108 +347,313 @@ class Simulation:
 
         for floor in floor_to_arrivals:
             arrivals = floor_to_arrivals[floor]
+            for person in arrivals:
+                person.arrive(self._clock)
             self.total_people += len(arrivals)
-            self.waiting[floor].extend(arrivals)
+            self.waiting.add(floor, arrivals)
 
         Visualizer.show_arrivals(self.visualizer, floor_to_arrivals)
 
     def _handle_leaving(self) -> None:
         """Handle people leaving elevators."""
-        for elevator in self.elevators:
-            passenger_list = elevator.get_passengers()
-
-            i = 0
-            while i < len(passenger_list):
-                passenger = passenger_list[i]
-                if passenger.get_target_floor() == elevator.get_current_floor():
-                    self.people_completed.append(passenger)
-                    elevator.person_disembark(passenger)
+        self._leave(self.elevators)
+
+    def _leave(self, elevators: List[HeadlessElevator]) -> None:
+        """Let the passengers of <elevators> who are at their target floor
+        leave, and visualize them.
+        """
+        for elevator in elevators:
+            leaving = elevator.disembark_at(elevator.current_floor)
+            if leaving:
+                for passenger in leaving:
+                    passenger.complete()
                     Visualizer.show_disembarking(self.visualizer,
                                                  passenger, elevator)
-                else:
-                    i += 1
+                self.people_completed.add(leaving)
 
     def _handle_boarding(self) -> None:
         """Handle boarding of people and visualize."""
-        """
-        arrival_generator: algorithms.ArrivalGenerator
-        elevators: List[Elevator]
-        moving_algorithm: algorithms.MovingAlgorithm
-        num_floors: int
-        visualizer: Visualizer
-        waiting: Dict[int, List[Person]]
-        """
-        for elevator in self.elevators:
-            while len(elevator.passengers) < elevator.max_capacity:
-                waiting_list = self.waiting[elevator.current_floor]
-                if len(waiting_list) != 0:
-                    wait_max = waiting_list.pop(0)
-                    elevator.passengers.append(wait_max)
-                    Visualizer.show_boarding(self.visualizer, wait_max,
-                                             elevator)
-                else:
-                    break
+        self._board(self.elevators)
 
+        # Wait times follow from the clock, so finishing a round does not
+        # need to visit every person in the simulation.
         self.num_round += 1
-        self._increase_wait_time()
+        self._clock.now = self.num_round
 
-    def _increase_wait_time(self) -> None:
-        """Increase wait time for people who is waiting for the elevator and
-        who is travelling on the elevator.
-        """
-        # increase wait_time for people waiting
-        for floor in self.waiting:
-            wait_list = self.waiting[floor]
-            for person in wait_list:
-                person.wait()
+    def _board(self, elevators: List[HeadlessElevator]) -> None:
+        """Board waiting people onto <elevators>, and visualize them."""
+        self._board_from(self.waiting, elevators)
 
-        # increase wait_time for people travelling
-        for elevator in self.elevators:
-            for person in elevator.get_passengers():
-                person.wait()
+    def _board_from(self, waiting: WaitingQueues,
+                    elevators: List[HeadlessElevator]) -> None:
+        """Board people from <waiting> onto <elevators>, and visualize them.
+
+        People only board an elevator going their way. An empty elevator
+        goes the way of the person who has waited longest on its floor. An
+        elevator with passengers goes the way it last moved, or, if it stayed
+        still, the way of its first passenger's target floor.
+        """
+        for elevator in elevators:
+            free = elevator.max_capacity - len(elevator.passengers)
+            if free <= 0:
+                continue
+            floor = elevator.current_floor
+            if not elevator.passengers:
+                direction = waiting[floor].first_direction()
+            elif elevator.direction != 0:
+                direction = elevator.direction
+            elif elevator.passengers[0].target > floor:
+                direction = UP
+            else:
+                direction = DOWN
+            if direction is None:
+                continue
+            boarded = waiting.board(floor, free, direction)
+            elevator.board(boarded)
+            for person in boarded:
+                person.board()
+                Visualizer.show_boarding(self.visualizer, person, elevator)
 
     def _move_elevators(self) -> None:
         """Move the elevators in this simulation.
 
         Use this simulation's moving algorithm to move the elevators.
         """
-        direction_list = self.moving_algorithm.move_elevators(self.elevators,
-                                                              self.waiting,
-                                                              self.num_floors)
+        direction_list = self._choose_directions(self.elevators, self.waiting,
+                                                 self.num_floors)
         for i in range(len(direction_list)):
             self.elevators[i].set_current_floor(direction_list[i].value)
 
         Visualizer.show_elevator_moves(self.visualizer, self.elevators,
                                        direction_list)
 
+    ############################################################################
+    # Leaving and boarding in a zoned building
+    ############################################################################
+    def _leave_zoned(self, elevators: List[HeadlessElevator]) -> None:
+        """Let the passengers of <elevators> who are at the end of a leg of
+        their trip leave, and visualize them. Those who are not at their
+        final target wait for the next leg.
+        """
+        for elevator in elevators:
+            floor = elevator.current_floor
+            leaving = elevator.disembark_at(floor)
+            if not leaving:
+                continue
+            finished, transferring = [], []
+            for passenger in leaving:
+                Visualizer.show_disembarking(self.visualizer, passenger,
+                                             elevator)
+                if passenger.final_target == floor:
+                    passenger.complete()
+                    finished.append(passenger)
+                else:
+                    passenger.transfer()
+                    transferring.append(passenger)
+            if finished:
+                self.people_completed.add(finished)
+            if transferring:
+                self.waiting.add(floor, transferring)
+
+    def _board_zoned(self, elevators: List[HeadlessElevator]) -> None:
+        """Board the people waiting for each bank onto the elevators of that
+        bank among <elevators>, and visualize them.
+        """
+        boarding = set(elevators)
+        for bank, indices in enumerate(self._layout.banks):
+            self._board_from(self.waiting.banks[bank],
+                             [self.elevators[index] for index in indices
+                              if self.elevators[index] in boarding])
+
+    ############################################################################
+    # Stages of a round under the kinematic model
+    ############################################################################
+    def _handle_leaving_kinematic(self) -> None:
+        """Start a round of the kinematic model, and handle people leaving
+        the elevators that are ready, which stay while they leave.
+        """
+        self._motion.start_round(self.num_round)
+        self._stop_while(self._leave)
+
+    def _handle_boarding_kinematic(self) -> None:
+        """Handle boarding of people onto the elevators that were ready at
+        the start of the round, which stay while they board.
+        """
+        self._stop_while(self._board)
+
+        self.num_round += 1
+        self._clock.now = self.num_round
+
+    def _stop_while(self, stage: Callable[[List[HeadlessElevator]], None]
+                    ) -> None:
+        """Run <stage> on the elevators that were ready at the start of the
+        round, and keep each of them at its floor while the people whose
+        number of passengers <stage> changed get on or off.
+        """
+        ready = [index for index, is_ready in enumerate(self._motion.ready)
+                 if is_ready]
+        loads = [len(self.elevators[index].passengers) for index in ready]
+        stage([self.elevators[index] for index in ready])
+        for index, load in zip(ready, loads):
+            self._motion.stop(
+                index, abs(len(self.elevators[index].passengers) - load))
+
+    def _move_elevators_kinematic(self) -> None:
+        """Move the elevators that are free using the moving algorithm, and
+        keep the others on their way.
+
+        The moving algorithm is given every elevator, as in the plain model,
+        so an algorithm that keeps state for each elevator by its index sees
+        them all in the same order every round. The directions it chooses
+        for elevators that are not free are ignored: the algorithms only keep
+        what they plan to do, such as the calls assigned to an elevator or
+        the way it is sweeping, which still holds when a move is put off.
+        """
+        direction_list = list(self._choose_directions(
+            self.elevators, self.waiting, self.num_floors))
+        for i, elevator in enumerate(self.elevators):
+            if self._motion.is_free(i):
+                self._motion.move(i, direction_list[i].value,
+                                  elevator.direction)
+                elevator.set_current_floor(direction_list[i].value)
+            else:
+                direction_list[i] = algorithms.Direction.STAY
+
+        Visualizer.show_elevator_moves(self.visualizer, self.elevators,
+                                       direction_list)
+
+    ############################################################################
+    # Snapshots
+    ############################################################################
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the state of this simulation between two rounds, as plain
+        data that can be pickled.
+
+        Each person still in the simulation is saved as a tuple (start floor,
+        target floor, arrival round, boarding round or None, final target
+        floor, round they started waiting for their current leg, queue time),
+        and each elevator as a tuple (current floor, direction, passengers).
+        The state of the random module, that of the arrival generator and
+        moving algorithm (see their get_state methods), and that of the
+        kinematic model, if any, are saved too.
+        """
+        return {
+            'num_round': self.num_round,
+            'total_people': self.total_people,
+            'waiting': {floor: [_person_state(person) for person in queue]
+                        for floor, queue in self.waiting.items() if queue},
+            'elevators': [(elevator.current_floor, elevator.direction,
+                           [_person_state(person)
+                            for person in elevator.passengers])
+                          for elevator in self.elevators],
+            'people_completed': copy.deepcopy(self.people_completed),
+            'random': random.getstate(),
+            'arrival_generator': self.arrival_generator.get_state(),
+            'moving_algorithm': self._dispatcher.get_state(),
+            'motion': (None if self._motion is None
+                       else self._motion.get_state())
+        }
+
+    def restore(self, snapshot: Dict[str, Any]) -> None:
+        """Put this simulation back in the state saved in <snapshot>.
+
+        The snapshot may come from another simulation, as long as it has the
+        same number of floors and elevators, the same elevator capacity, and
+        an arrival generator and moving algorithm built the same way. This is
+        how one warm-up period can be shared by many variants. People already
+        in a visualized simulation are not redrawn.
+        """
+        self.num_round = snapshot['num_round']
+        self._clock.now = self.num_round
+        self.total_people = snapshot['total_people']
+
+        self.waiting = self._empty_waiting()
+        for floor, people in snapshot['waiting'].items():
+            self.waiting.add(floor, [self._restore_person(state)
+                                     for state in people])
+        for elevator, (floor, direction, passengers) in zip(
+                self.elevators, snapshot['elevators']):
+            for target in elevator.get_target_floors():
+                elevator.disembark_at(target)
+            elevator.set_current_floor(floor - elevator.current_floor)
+            elevator.direction = direction
+            elevator.board([self._restore_person(state)
+                            for state in passengers])
+
+        self.people_completed = copy.deepcopy(snapshot['people_completed'])
+        random.setstate(snapshot['random'])
+        self.arrival_generator.set_state(snapshot['arrival_generator'])
+        self._dispatcher.set_state(snapshot['moving_algorithm'])
+        if self._motion is not None:
+            self._motion.set_state(snapshot['motion'])
+
+    def save_checkpoint(self, filename: str) -> None:
+        """Save a snapshot of this simulation to the file <filename>.
+
+        The snapshot is written to a temporary file first, so <filename>
+        always holds a complete snapshot, even if saving is interrupted.
+        """
+        partial = filename + '.partial'
+        with open(partial, 'wb') as checkpoint:
+            pickle.dump(self.snapshot(), checkpoint, pickle.HIGHEST_PROTOCOL)
+        os.replace(partial, filename)
+
+    def _empty_waiting(self) -> Union[WaitingQueues, ZonedQueues]:
+        """Return empty queues for the people waiting in this simulation."""
+        if self._layout is None:
+            return WaitingQueues(self.num_floors)
+        return ZonedQueues(self._layout)
+
+    def _restore_person(self, state: Tuple[int, int, int, Optional[int],
+                                           int, int, int]
+                        ) -> HeadlessPerson:
+        """Return a new person in this simulation with the saved <state>."""
+        (start, target, arrival_round, boarded_round, final_target,
+         queued_round, queue_time) = state
+        person = self.arrival_generator.person_type(start, final_target)
+        person.target = target
+        person.arrive(self._clock)
+        person.arrival_round = arrival_round
+        person.boarded_round = boarded_round
+        person.queued_round = queued_round
+        person.queue_time = queue_time
+        return person
+
     ############################################################################
     # Statistics calculations
     ############################################################################
     def _calculate_stats(self) -> Dict[str, int]:
         """Report the statistics for the current run of this simulation.
-        """
-        wait_time_of_completed = []
-        for person in self.people_completed:
-            wait_time_of_completed.append(person.get_wait_time())
-
-        if len(self.people_completed) != 0:
-            max_time = max(wait_time_of_completed)
-            min_time = min(wait_time_of_completed)
-            avg_time = round(sum(wait_time_of_completed) /
-                             len(wait_time_of_completed))
-        else:
-            max_time = -1
-            min_time = -1
-            avg_time = -1
 
-        return {
+        Besides the statistics in the assignment handout, this reports the
+        average, smallest, largest and p50, p90, p99 and p99.9 percentile
+        times spent waiting in total ('_time'), waiting on a floor
+        ('_queue_time') and riding an elevator ('_car_time'). Percentiles of
+        times of 1024 rounds or more are estimates. Every time is -1 if
+        nobody has reached their target floor.
+        """
+        stats = {
             'num_iterations': self.num_round,
-            'total_people': self.total_people,
-            'people_completed': len(self.people_completed),
-            'max_time': max_time,
-            'min_time': min_time,
-            'avg_time': avg_time
+            'total_people': self.total_people
         }
+        stats.update(self.people_completed.stats.summary())
+        return stats
+
+
+def _person_state(person: HeadlessPerson
+                  ) -> Tuple[int, int, int, Optional[int], int, int, int]:
+    """Return the state of <person> saved in a simulation snapshot."""
+    return (person.start, person.target, person.arrival_round,
+            person.boarded_round, person.final_target, person.queued_round,
+            person.queue_time)
+
+
+def load_checkpoint(filename: str) -> Dict[str, Any]:
+    """Return the snapshot saved in the checkpoint file <filename>, to pass
+    to Simulation.restore.
+    """
+    with open(filename, 'rb') as checkpoint:
+        return pickle.load(checkpoint)
 
 
 def sample_run() -> Dict[str, int]:
@@ -242,14 +673,202 @@ def sample_run() -> Dict[str, int]:
     return results
 
 
+# The configuration values that sweep varies, with the value used for any of
+# them that is missing from the grid. moving_algorithm is the name of a
+# MovingAlgorithm class in algorithms, and arrival_rate is the number of people
+# RandomArrivals generates each round. If arrival_trace is the name of a
+# binary trace file (see algorithms.write_binary_trace), arrivals are replayed
+# from it instead; every worker maps the same file, so they share one copy.
+SWEEP_DEFAULTS = {
+    'num_floors': 5,
+    'num_elevators': 1,
+    'elevator_capacity': 4,
+    'moving_algorithm': 'PushyPassenger',
+    'arrival_rate': 2,
+    'arrival_trace': None,
+    'seed': 0
+}
+
+
+def sweep(grid: Dict[str, List[Any]], num_rounds: int,
+          processes: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Run a simulation for every combination of the values in <grid>, and
+    yield one row for each run as soon as it finishes.
+
+    <grid> maps some of the keys of SWEEP_DEFAULTS to the list of values to
+    try. Each row holds the configuration values of a run, the statistics
+    returned by Simulation.run, and under 'trip_stats' the TripStats of the
+    run, which can be merged with those of other rows. Runs are spread over
+    <processes> worker processes (by default, one per CPU), so rows arrive in
+    the order the runs finish, not the order of the grid.
+
+    Precondition: num_rounds >= 1
+    """
+    keys = list(SWEEP_DEFAULTS)
+    values = [grid.get(key, [SWEEP_DEFAULTS[key]]) for key in keys]
+    points = [(dict(zip(keys, combination)), num_rounds)
+              for combination in itertools.product(*values)]
+    with multiprocessing.Pool(processes) as pool:
+        yield from pool.imap_unordered(_run_sweep_point, points)
+
+
+def _run_sweep_point(point: Tuple[Dict[str, Any], int]) -> Dict[str, Any]:
+    """Run the simulation for one combination of sweep values, and return its
+    row.
+
+    This runs in a worker process of sweep.
+    """
+    values, num_rounds = point
+    random.seed(values['seed'])
+    if values['arrival_trace'] is None:
+        arrival_generator = algorithms.RandomArrivals(values['num_floors'],
+                                                      values['arrival_rate'])
+    else:
+        arrival_generator = algorithms.BinaryFileArrivals(
+            values['num_floors'], values['arrival_trace'])
+    config = {
+        'num_floors': values['num_floors'],
+        'num_elevators': values['num_elevators'],
+        'elevator_capacity': values['elevator_capacity'],
+        'num_people_per_round': values['arrival_rate'],
+        'arrival_generator': arrival_generator,
+        'moving_algorithm': getattr(algorithms, values['moving_algorithm'])(),
+        'visualize': False
+    }
+    simulation = Simulation(config)
+    row = dict(values)
+    row.update(simulation.run(num_rounds))
+    row['trip_stats'] = simulation.people_completed.stats
+    if values['arrival_trace'] is not None:
+        arrival_generator.close()
+    return row
+
+
+# The simulation that branches are forked from, set by branch_run while its
+# worker processes are running.
+_branch_base = None
+
+
+def branch_run(simulation: Simulation,
+               moving_algorithms: List[algorithms.MovingAlgorithm],
+               num_rounds: int, processes: Optional[int] = None
+               ) -> List[Dict[str, Any]]:
+    """Continue <simulation> up to round <num_rounds> once with each moving
+    algorithm in <moving_algorithms>, and return the statistics of each
+    branch in the same order.
+
+    <simulation> is usually part way through a run, for example after a
+    shared warm-up period, and is left as it is. Where the operating system
+    can fork processes, each branch runs in its own forked copy of the
+    current process, in up to <processes> processes at a time (by default,
+    one per CPU). Memory pages are only copied once a branch changes them, so
+    the waiting people and elevators are never copied up front. Elsewhere,
+    the branches run one after another, each starting from a snapshot of
+    <simulation>.
+
+    Branches save no checkpoints, so a checkpoint file of <simulation> is
+    left holding its own state rather than that of some branch.
+
+    The simulation should not be visualized.
+
+    Precondition: num_rounds >= 1
+    """
+    global _branch_base
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return _run_branches_in_turn(simulation, moving_algorithms,
+                                     num_rounds)
+
+    _branch_base = (simulation, moving_algorithms, num_rounds,
+                    random.getstate())
+    try:
+        # Each worker runs a single branch, so that every branch starts from
+        # a fresh fork of this process rather than the end of another branch.
+        context = multiprocessing.get_context('fork')
+        with context.Pool(processes, maxtasksperchild=1) as pool:
+            return pool.map(_run_branch, range(len(moving_algorithms)),
+                            chunksize=1)
+    finally:
+        _branch_base = None
+
+
+def _run_branch(index: int) -> Dict[str, Any]:
+    """Run the branch using moving algorithm number <index>, and return its
+    statistics.
+
+    This runs in a worker process of branch_run, forked while _branch_base
+    was set.
+    """
+    simulation, moving_algorithms, num_rounds, random_state = _branch_base
+    # The random module reseeds itself in forked processes.
+    random.setstate(random_state)
+    # Give this branch its own handles on any files the generator reads.
+    generator = simulation.arrival_generator
+    generator.set_state(generator.get_state())
+    # Branches run at the same time, and must not write over the checkpoint
+    # of the simulation they were forked from.
+    simulation._checkpoint_file = None
+    simulation.set_moving_algorithm(moving_algorithms[index])
+    return simulation.run(num_rounds)
+
+
+def _run_branches_in_turn(simulation: Simulation,
+                          moving_algorithms: List[algorithms.MovingAlgorithm],
+                          num_rounds: int) -> List[Dict[str, Any]]:
+    """Run the branches of branch_run one after another, and return their
+    statistics.
+    """
+    start = simulation.snapshot()
+    original_algorithm = simulation.moving_algorithm
+    checkpoint_file = simulation._checkpoint_file
+    simulation._checkpoint_file = None
+    results = []
+    try:
+        for moving_algorithm in moving_algorithms:
+            simulation.restore(start)
+            simulation.set_moving_algorithm(moving_algorithm)
+            results.append(simulation.run(num_rounds))
+    finally:
+        simulation.restore(start)
+        simulation.set_moving_algorithm(original_algorithm)
+        simulation._checkpoint_file = checkpoint_file
+    return results
+
+
+def sample_sweep() -> None:
+    """Run a sample sweep, print each row of results as it arrives, and then
+    print the wait time percentiles of all of the runs together.
+    """
+    grid = {
+        'num_floors': [5, 10, 20],
+        'num_elevators': [1, 2, 4],
+        'moving_algorithm': ['PushyPassenger', 'ShortSighted'],
+        'seed': [0, 1]
+    }
+    columns = [key for key in SWEEP_DEFAULTS if key != 'arrival_trace']
+    columns += ['people_completed', 'max_time', 'min_time', 'avg_time']
+    print(' '.join(f'{column:>17}' for column in columns))
+    overall = TripStats()
+    for row in sweep(grid, 100):
+        print(' '.join(f'{row[column]:>17}' for column in columns))
+        overall.merge(row['trip_stats'])
+    print({key: value for key, value in overall.summary().items()
+           if key.endswith('_time') and key.startswith('p')})
+
+
 if __name__ == '__main__':
     # Uncomment this line to run our sample simulation (and print the
     # statistics generated by the simulation).
     print(sample_run())
 
+    # Or this one, to run a sample sweep over many configurations.
+    # sample_sweep()
+
     # import python_ta
     # python_ta.check_all(config={
-    #     'extra-imports': ['entities', 'visualizer', 'algorithms', 'time'],
+    #     'extra-imports': ['entities', 'visualizer', 'algorithms', 'waiting',
+    #                       'profiling', 'stats', 'kinematics', 'zones',
+    #                       'copy', 'itertools', 'multiprocessing', 'os',
+    #                       'pickle', 'random'],
     #     'max-nested-blocks': 4,
     #     'max-attributes': 12,
     #     'disable': ['R0201']
@@ -0,0 +1,53 @@
+"""CSC148 Assignment 1 - Visualized People and Elevators
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module description ===
+This module contains the versions of Person and Elevator that can be drawn by
+the visualizer. Each one combines the simulation state from entities.py with
+a kind of sprite found in sprites.py.
+
+Importing this module imports Pygame, so it is only imported when a
+simulation is visualized.
+"""
+from entities import HeadlessElevator, HeadlessPerson
+from sprites import PersonSprite, ElevatorSprite
+
+
+class Elevator(HeadlessElevator, ElevatorSprite):
+    """An elevator in the elevator simulation that can be visualized.
+
+    See HeadlessElevator for the attributes and representation invariants.
+    """
+
+    def __init__(self, max_capacity: int) -> None:
+        """
+        Initialize a new elevator.
+
+        Precondition: max_capacity >= 1
+        """
+        ElevatorSprite.__init__(self)
+        HeadlessElevator.__init__(self, max_capacity)
+
+
+class Person(HeadlessPerson, PersonSprite):
+    """A person in the elevator simulation that can be visualized.
+
+    See HeadlessPerson for the attributes and representation invariants.
+    """
+
+    def __init__(self, start: int, target: int) -> None:
+        """
+        Initialize a person who takes elevator.
+        """
+        HeadlessPerson.__init__(self, start, target)
+        PersonSprite.__init__(self)
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['entities', 'sprites']
+    })
@@ -18,12 +18,15 @@ and PersonSprite, as you'll be implementing their subclasses.
 You can completely ignore the other Sprite classes in this file.
 """
 import random
-from typing import Any
+from typing import Any, List
 import pygame
 
 
 # Images for people
 FIGURES = [f'people/person{i}.png' for i in range(1, 6)]
+# The images in FIGURES, loaded and scaled to the person size once and shared
+# by every PersonSprite (see get_figure_images)
+_figure_images = []
 
 
 WHITE = (255, 255, 255)
@@ -49,8 +52,34 @@ PERSON_WIDTH = 32         # Person width
 
 # Fonts
 FONT_HEIGHT = 30
-pygame.init()
-COMIC_SANS = pygame.font.SysFont('Comic Sans MS', FONT_HEIGHT)
+_comic_sans = None
+
+
+def get_font() -> pygame.font.Font:
+    """Return the font used for text sprites, loading it on first use.
+
+    Loading a system font initializes Pygame and scans the installed fonts,
+    so this is only done once something is actually drawn.
+    """
+    global _comic_sans
+    if _comic_sans is None:
+        pygame.init()
+        _comic_sans = pygame.font.SysFont('Comic Sans MS', FONT_HEIGHT)
+    return _comic_sans
+
+
+def get_figure_images() -> List[pygame.Surface]:
+    """Return the images in FIGURES scaled to the size of a person.
+
+    The images are read from disk the first time this is called, and the same
+    surfaces are returned afterwards.
+    """
+    if not _figure_images:
+        for figure in FIGURES:
+            image = pygame.image.load(figure)
+            _figure_images.append(
+                pygame.transform.scale(image, (PERSON_WIDTH, PERSON_HEIGHT)))
+    return _figure_images
 
 
 ###############################################################################
@@ -99,6 +128,7 @@ class PersonSprite(pygame.sprite.Sprite):
     width: the width of the person sprite
     image: the Pygame surface on which to draw this sprite
     rect: the rectangle representing the dimensions of this sprite
+    image_level: the anger level that image was chosen for
 
     === Representation Invariants ===
     height >= 0
@@ -108,22 +138,35 @@ class PersonSprite(pygame.sprite.Sprite):
     width: int
     image: pygame.Surface
     rect: pygame.Rect
+    image_level: int
 
     def __init__(self) -> None:
         """Initialize a new person sprite."""
         super().__init__()
         self.width, self.height = PERSON_WIDTH, PERSON_HEIGHT
+        self.image_level = self.get_anger_level()
         self.image = self.load_image()
         self.rect = self.image.get_rect()
         self.rect.bottom = 0
         self.rect.centerx = random.randint(-2, 2)
 
     def load_image(self) -> Any:
-        """Load the image for this sprite and redraws it
+        """Return the image for this sprite's current anger level.
         Lower indices are happier :)
+
+        The image is shared with every other sprite at the same anger level,
+        so it must not be drawn on.
+        """
+        return get_figure_images()[self.get_anger_level()]
+
+    def update_image(self) -> None:
+        """Swap this sprite's image if its anger level has changed since the
+        image was last chosen.
         """
-        image = pygame.image.load(FIGURES[self.get_anger_level()])
-        return pygame.transform.scale(image, (self.width, self.height))
+        level = self.get_anger_level()
+        if level != self.image_level:
+            self.image_level = level
+            self.image = get_figure_images()[level]
 
     def get_anger_level(self) -> int:
         """Return the anger level of this sprite.
@@ -154,7 +197,7 @@ class FloorNum(pygame.sprite.Sprite):
     """
     def __init__(self, floor_y: int, text: str) -> None:
         super().__init__()
-        self.floor_font = COMIC_SANS
+        self.floor_font = get_font()
         self.image = self.floor_font.render(text, True, BLACK)
         self.rect = self.image.get_rect()
         self.rect.bottom = floor_y
@@ -166,7 +209,7 @@ class StatLine(pygame.sprite.Sprite):
     """
     def __init__(self, y: int, text: str):
         super().__init__()
-        self.floor_font = COMIC_SANS
+        self.floor_font = get_font()
         self.image = self.floor_font.render(text, True, BLACK)
         self.rect = self.image.get_rect()
         self.rect.top = y
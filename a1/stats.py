@@ -0,0 +1,275 @@
+"""CSC148 Assignment 1 - Trip Statistics
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module description ===
+This module contains the accumulators the simulation uses to report how long
+people took to reach their target floor. Each one takes values one at a time
+and keeps a fixed amount of state, however many values it is given, and two
+accumulators of the same kind can be merged, for example to combine the
+results of runs done in parallel.
+
+RunningStats keeps the count, total, smallest and largest value.
+QuantileSketch estimates percentiles. TripStats puts these together for the
+total wait time, the time spent waiting on a floor and the time spent in an
+elevator, and reports them in the format of Simulation.run.
+"""
+from __future__ import annotations
+import math
+from typing import Dict, Optional
+
+# The percentiles reported by TripStats, as (key suffix, fraction) pairs.
+PERCENTILES = [('p50', 0.5), ('p90', 0.9), ('p99', 0.99), ('p999', 0.999)]
+
+
+class RunningStats:
+    """The count, total, smallest and largest of a sequence of integers.
+
+    === Attributes ===
+    count: the number of values added
+    total: the sum of the values added
+    minimum: the smallest value added, or None if none were added
+    maximum: the largest value added, or None if none were added
+    """
+    count: int
+    total: int
+    minimum: Optional[int]
+    maximum: Optional[int]
+
+    def __init__(self) -> None:
+        """Initialize empty running statistics."""
+        self.count = 0
+        self.total = 0
+        self.minimum = None
+        self.maximum = None
+
+    def add(self, value: int, count: int = 1) -> None:
+        """Add <count> copies of <value>.
+
+        Precondition: count >= 1
+        """
+        self.count += count
+        self.total += value * count
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    def merge(self, other: RunningStats) -> None:
+        """Add all of the values added to <other>."""
+        if other.count == 0:
+            return
+        if self.count == 0 or other.minimum < self.minimum:
+            self.minimum = other.minimum
+        if self.count == 0 or other.maximum > self.maximum:
+            self.maximum = other.maximum
+        self.count += other.count
+        self.total += other.total
+
+    def mean(self) -> Optional[float]:
+        """Return the mean of the values added, or None if none were added."""
+        if self.count == 0:
+            return None
+        return self.total / self.count
+
+
+class QuantileSketch:
+    """An estimate of the distribution of a sequence of non-negative
+    integers, for finding its percentiles.
+
+    Values below exact_limit are counted one by one, so percentiles that fall
+    among them are exact. Larger values are counted in buckets whose bounds
+    grow by a factor of growth, so a percentile that falls among them is off
+    by at most about (growth - 1) / 2 of its value. The number of buckets
+    therefore only grows with the logarithm of the largest value.
+
+    === Attributes ===
+    exact_limit: the smallest value that is not counted exactly
+    growth: the ratio between the bounds of consecutive buckets
+    count: the number of values added
+
+    === Private Attributes ===
+    _counts: maps each bucket to the number of values in it; values below
+             exact_limit are their own bucket
+
+    === Representation invariants ===
+    exact_limit >= 1
+    growth > 1
+    count == sum(_counts.values())
+    """
+    exact_limit: int
+    growth: float
+    count: int
+    _counts: Dict[int, int]
+
+    def __init__(self, exact_limit: int = 1024,
+                 relative_error: float = 0.01) -> None:
+        """Initialize an empty sketch.
+
+        Percentiles of values below <exact_limit> are exact, and others are
+        within about <relative_error> of their value.
+
+        Preconditions:
+            exact_limit >= 1
+            0 < relative_error < 1
+        """
+        self.exact_limit = exact_limit
+        self.growth = 1 + 2 * relative_error
+        self.count = 0
+        self._counts = {}
+
+    def add(self, value: int, count: int = 1) -> None:
+        """Add <count> copies of <value>.
+
+        Precondition: value >= 0 and count >= 1
+        """
+        bucket = self._bucket(value)
+        self._counts[bucket] = self._counts.get(bucket, 0) + count
+        self.count += count
+
+    def merge(self, other: QuantileSketch) -> None:
+        """Add all of the values added to <other>.
+
+        Raise ValueError if <other> does not have the same exact_limit and
+        growth as this sketch.
+        """
+        if (other.exact_limit != self.exact_limit or
+                other.growth != self.growth):
+            raise ValueError('only sketches with the same exact_limit and '
+                             'growth can be merged')
+        for bucket, count in other._counts.items():
+            self._counts[bucket] = self._counts.get(bucket, 0) + count
+        self.count += other.count
+
+    def quantile(self, fraction: float) -> Optional[int]:
+        """Return the smallest value that at least <fraction> of the values
+        added are less than or equal to, or None if no values were added.
+
+        Precondition: 0 <= fraction <= 1
+        """
+        if self.count == 0:
+            return None
+        rank = max(1, math.ceil(fraction * self.count))
+        seen = 0
+        for bucket in sorted(self._counts):
+            seen += self._counts[bucket]
+            if seen >= rank:
+                return self._value(bucket)
+        return self._value(max(self._counts))
+
+    def _bucket(self, value: int) -> int:
+        """Return the bucket that <value> is counted in."""
+        if value < self.exact_limit:
+            return value
+        return self.exact_limit + int(math.log(value / self.exact_limit,
+                                               self.growth))
+
+    def _value(self, bucket: int) -> int:
+        """Return the value reported for the values in <bucket>."""
+        if bucket < self.exact_limit:
+            return bucket
+        return round(self.exact_limit *
+                     self.growth ** (bucket - self.exact_limit + 0.5))
+
+
+class TimeStats:
+    """Running statistics and a quantile sketch of one kind of time.
+
+    === Attributes ===
+    running: the count, total, smallest and largest time
+    sketch: the estimated distribution of the times
+    """
+    running: RunningStats
+    sketch: QuantileSketch
+
+    def __init__(self) -> None:
+        """Initialize empty time statistics."""
+        self.running = RunningStats()
+        self.sketch = QuantileSketch()
+
+    def add(self, value: int, count: int = 1) -> None:
+        """Add <count> copies of the time <value>.
+
+        Precondition: value >= 0 and count >= 1
+        """
+        self.running.add(value, count)
+        self.sketch.add(value, count)
+
+    def merge(self, other: TimeStats) -> None:
+        """Add all of the times added to <other>."""
+        self.running.merge(other.running)
+        self.sketch.merge(other.sketch)
+
+    def summary(self, name: str) -> Dict[str, int]:
+        """Return the average, smallest, largest and percentile times, with
+        keys like 'avg_<name>' and 'p99_<name>'.
+
+        Every figure is -1 if no times were added.
+        """
+        if self.running.count == 0:
+            figures = {'avg': -1, 'min': -1, 'max': -1}
+            figures.update((key, -1) for key, _ in PERCENTILES)
+        else:
+            figures = {'avg': round(self.running.mean()),
+                       'min': self.running.minimum,
+                       'max': self.running.maximum}
+            figures.update((key, self.sketch.quantile(fraction))
+                           for key, fraction in PERCENTILES)
+        return {f'{key}_{name}': value for key, value in figures.items()}
+
+
+class TripStats:
+    """The times of the trips people made to their target floor.
+
+    === Attributes ===
+    wait: the time from arriving to reaching the target floor, which is the
+          wait time reported by the simulation
+    queue: the time spent waiting for an elevator, on every leg of the trip
+    car: the rest of the wait time, spent riding elevators
+    """
+    wait: TimeStats
+    queue: TimeStats
+    car: TimeStats
+
+    def __init__(self) -> None:
+        """Initialize empty trip statistics."""
+        self.wait = TimeStats()
+        self.queue = TimeStats()
+        self.car = TimeStats()
+
+    def add(self, arrival_round: int, queue_time: int,
+            completion_round: int) -> None:
+        """Add a trip with the given arrival and completion rounds, which
+        spent <queue_time> rounds waiting for an elevator.
+
+        Precondition: 0 <= queue_time <= completion_round - arrival_round
+        """
+        wait = completion_round - arrival_round
+        self.wait.add(wait)
+        self.queue.add(queue_time)
+        self.car.add(wait - queue_time)
+
+    def merge(self, other: TripStats) -> None:
+        """Add all of the trips added to <other>."""
+        self.wait.merge(other.wait)
+        self.queue.merge(other.queue)
+        self.car.merge(other.car)
+
+    def summary(self) -> Dict[str, int]:
+        """Return the statistics of the trips, in the format of
+        Simulation.run, apart from num_iterations and total_people.
+        """
+        summary = {'people_completed': self.wait.running.count}
+        summary.update(self.wait.summary('time'))
+        summary.update(self.queue.summary('queue_time'))
+        summary.update(self.car.summary('car_time'))
+        return summary
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['math']
+    })
@@ -18,9 +18,12 @@ import random
 import time
 from typing import Dict, List
 
-import pygame
 from algorithms import Direction
-import sprites
+
+# pygame and the sprites module are only imported once a Visualizer is built
+# with visualize=True (see _import_pygame), so headless runs never load SDL.
+pygame = None
+sprites = None
 
 
 # Colour constants
@@ -36,6 +39,15 @@ FLOOR_BORDER_HEIGHT = 10  # The height of the border
 FPS = 60
 
 
+def _import_pygame() -> None:
+    """Import pygame and the sprites module into this module's namespace."""
+    global pygame, sprites
+    if pygame is None:
+        import pygame as pygame_module
+        import sprites as sprites_module
+        pygame, sprites = pygame_module, sprites_module
+
+
 class Visualizer:
     """Visualizer for the current state of a simulation.
 
@@ -58,6 +70,7 @@ class Visualizer:
         self._num_floors = num_floors
 
         # pygame stuff
+        _import_pygame()
         pygame.init()
         self._clock = pygame.time.Clock()
 
@@ -81,7 +94,7 @@ class Visualizer:
         self._stats_group.add(sprites.StatLine(0, f'Round {round_num}'))
         for sprite in self._sprite_group:
             if isinstance(sprite, sprites.PersonSprite):
-                sprite.image = sprite.load_image()
+                sprite.update_image()
         self.render()
 
     def _total_height(self) -> int:
@@ -209,7 +222,8 @@ class Visualizer:
         for i, elevator in enumerate(elevators):
             elevator.rect.centerx =\
                 (i + 1) * WIDTH // (self._num_elevators + 1)
-            elevator.rect.bottom = self._total_height() - FLOOR_BORDER_HEIGHT
+            elevator.rect.bottom = self.get_y_of_floor(
+                elevator.current_floor)
 
             self._sprite_group.add(elevator)
 
@@ -0,0 +1,275 @@
+"""CSC148 Assignment 1 - Waiting Queues
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module description ===
+This module contains WaitingQueues, the structure the simulation uses to keep
+track of the people waiting for an elevator on each floor, and FloorQueue,
+which holds the people going up and the people going down from one floor.
+"""
+from bisect import bisect_left, insort
+from collections import deque
+from heapq import merge
+from typing import (Deque, Dict, Iterable, Iterator, List, Optional, Tuple,
+                    Union)
+
+from entities import HeadlessPerson
+
+# The directions of travel of the two queues on each floor. They match the
+# values of algorithms.Direction.
+UP = 1
+DOWN = -1
+
+
+class FloorQueue:
+    """The people waiting for an elevator on one floor, as one first-in-
+    first-out queue of people going up and one of people going down.
+
+    Iterating over a FloorQueue gives every person waiting on the floor in the
+    order they arrived, whichever way they are going, and indexing or slicing
+    it counts people in that same order, as for a list.
+
+    === Private Attributes ===
+    _queues: maps UP and DOWN to the queue of people going that way, with the
+             person who arrived first at the left end; each person is stored
+             with the number of people who arrived in the building before
+             them, which gives the order of arrival across both queues
+
+    === Representation invariants ===
+    Every person in _queues[UP] has a target floor above this floor, and
+    every person in _queues[DOWN] has one below it.
+    The arrival numbers in each queue are increasing.
+    """
+    _queues: Dict[int, Deque[Tuple[int, HeadlessPerson]]]
+
+    def __init__(self) -> None:
+        """Initialize an empty floor."""
+        self._queues = {UP: deque(), DOWN: deque()}
+
+    def __len__(self) -> int:
+        """Return the number of people waiting on this floor."""
+        return len(self._queues[UP]) + len(self._queues[DOWN])
+
+    def __iter__(self) -> Iterator[HeadlessPerson]:
+        """Yield the people waiting on this floor in the order they arrived.
+        """
+        for _, person in merge(self._queues[UP], self._queues[DOWN],
+                               key=lambda entry: entry[0]):
+            yield person
+
+    def __getitem__(self, index: Union[int, slice]
+                    ) -> Union[HeadlessPerson, List[HeadlessPerson]]:
+        """Return the person at <index> in the order people arrived on this
+        floor, or a list of the people in <index> if it is a slice.
+
+        Raise IndexError if <index> is an integer out of range.
+        """
+        if isinstance(index, int) and index == 0 and len(self) > 0:
+            # The person who arrived first is at the front of one queue.
+            return self._queues[self.first_direction()][0][1]
+        return list(self)[index]
+
+    def count(self, direction: int) -> int:
+        """Return the number of people on this floor going in <direction>,
+        UP or DOWN.
+        """
+        return len(self._queues[direction])
+
+    def first_direction(self) -> Optional[int]:
+        """Return the direction the person who arrived first on this floor is
+        going in, or None if nobody is waiting here.
+        """
+        up, down = self._queues[UP], self._queues[DOWN]
+        if not up and not down:
+            return None
+        elif not down or (up and up[0][0] < down[0][0]):
+            return UP
+        else:
+            return DOWN
+
+    def append(self, number: int, person: HeadlessPerson,
+               direction: int) -> None:
+        """Add <person>, the <number>-th arrival in the building, to the back
+        of the queue for <direction>, UP or DOWN.
+        """
+        self._queues[direction].append((number, person))
+
+    def take(self, count: int, direction: Optional[int] = None
+             ) -> List[HeadlessPerson]:
+        """Remove and return the first <count> people going in <direction>,
+        or the first <count> people of either direction if <direction> is
+        None, in the order they arrived.
+
+        If fewer people than that are waiting, remove and return all of them.
+        """
+        if direction is not None:
+            queue = self._queues[direction]
+            if count >= len(queue):
+                taken = [person for _, person in queue]
+                queue.clear()
+                return taken
+            return [queue.popleft()[1] for _ in range(count)]
+
+        up, down = self._queues[UP], self._queues[DOWN]
+        taken = []
+        while len(taken) < count and (up or down):
+            if not down or (up and up[0][0] < down[0][0]):
+                taken.append(up.popleft()[1])
+            else:
+                taken.append(down.popleft()[1])
+        return taken
+
+
+class WaitingQueues(Dict[int, FloorQueue]):
+    """The people waiting for an elevator, as first-in-first-out queues for
+    each floor and direction.
+
+    This is a dictionary mapping floor number to the FloorQueue of people
+    waiting on that floor. A FloorQueue can be iterated over, indexed and
+    sliced, and has a length, all with the people in the order they arrived,
+    so this can be passed to anything that reads a dictionary mapping floor
+    number to the list of people waiting there. It should only be changed
+    through add and board, though: a FloorQueue has none of the methods of a
+    list that change it, and its count method counts the people going one
+    way rather than the copies of a person.
+
+    The number of people going up or down from a floor is known without
+    looking at them. The floors where someone is waiting, and the floors
+    where someone is going each way, are also kept in sorted order as people
+    arrive and board, so the moving algorithms can find the lowest or closest
+    such floor without looking at every waiting person.
+
+    === Private Attributes ===
+    _occupied: the floors where at least one person is waiting, in increasing
+               order
+    _calls: maps UP and DOWN to the floors where at least one person going
+            that way is waiting, in increasing order
+    _arrivals: the number of people added so far
+
+    === Representation invariants ===
+    The keys are exactly the floors 1 to the number of floors.
+    Every person in self[floor] is on the floor where the current leg of
+    their trip starts: their start floor, or a transfer floor on a trip with
+    transfers.
+    A floor is in _occupied if and only if self[floor] is not empty.
+    A floor is in _calls[d] if and only if self[floor].count(d) > 0.
+    """
+    _occupied: List[int]
+    _calls: Dict[int, List[int]]
+    _arrivals: int
+
+    def __init__(self, num_floors: int) -> None:
+        """Initialize empty queues for floors 1 to <num_floors>.
+
+        Precondition: num_floors >= 1
+        """
+        super().__init__()
+        for floor in range(1, num_floors + 1):
+            self[floor] = FloorQueue()
+        self._occupied = []
+        self._calls = {UP: [], DOWN: []}
+        self._arrivals = 0
+
+    @classmethod
+    def from_dict(cls, waiting: Dict[int, Iterable[HeadlessPerson]]
+                  ) -> 'WaitingQueues':
+        """Return new queues holding the people in <waiting>, a dictionary
+        mapping floor number to the people waiting on that floor.
+
+        Precondition: the keys of <waiting> are floors 1 to the number of
+        floors.
+        """
+        queues = cls(len(waiting))
+        for floor, people in waiting.items():
+            queues.add(floor, people)
+        return queues
+
+    def add(self, floor: int, people: Iterable[HeadlessPerson]) -> None:
+        """Add <people> to the back of the queues on <floor>, in order."""
+        queue = self[floor]
+        was_empty = not queue
+        had_calls = [direction for direction in (UP, DOWN)
+                     if queue.count(direction)]
+        for person in people:
+            queue.append(self._arrivals, person,
+                         UP if person.target > floor else DOWN)
+            self._arrivals += 1
+        if was_empty and queue:
+            insort(self._occupied, floor)
+        for direction in (UP, DOWN):
+            if direction not in had_calls and queue.count(direction):
+                insort(self._calls[direction], floor)
+
+    def board(self, floor: int, count: int,
+              direction: Optional[int] = None) -> List[HeadlessPerson]:
+        """Remove and return the first <count> people waiting on <floor> who
+        are going in <direction>, UP or DOWN. If <direction> is None, take
+        the first people whichever way they are going.
+
+        If fewer than <count> such people are waiting there, remove and
+        return all of them.
+        """
+        queue = self[floor]
+        had_calls = [call for call in (UP, DOWN) if queue.count(call)]
+        boarded = queue.take(count, direction)
+        if boarded and not queue:
+            del self._occupied[bisect_left(self._occupied, floor)]
+        for call in had_calls:
+            if not queue.count(call):
+                calls = self._calls[call]
+                del calls[bisect_left(calls, floor)]
+        return boarded
+
+    def count(self, floor: int, direction: int) -> int:
+        """Return the number of people waiting on <floor> who are going in
+        <direction>, UP or DOWN.
+        """
+        return self[floor].count(direction)
+
+    def lowest_floor(self) -> Optional[int]:
+        """Return the lowest floor where someone is waiting, or None if nobody
+        is waiting.
+        """
+        if self._occupied:
+            return self._occupied[0]
+        return None
+
+    def occupied_floors(self, direction: Optional[int] = None) -> List[int]:
+        """Return the floors where someone going in <direction>, UP or DOWN,
+        is waiting, in increasing order. If <direction> is None, return the
+        floors where anyone is waiting.
+        """
+        return list(self._floors(direction))
+
+    def closest_floors(self, floor: int, direction: Optional[int] = None
+                       ) -> Tuple[Optional[int], Optional[int]]:
+        """Return the closest floors to <floor> where someone going in
+        <direction>, UP or DOWN, is waiting. If <direction> is None, consider
+        the floors where anyone is waiting.
+
+        The first floor returned is the highest one below <floor>, and the
+        second is the lowest one at or above <floor>. Either is None if there
+        is no such floor.
+        """
+        floors = self._floors(direction)
+        i = bisect_left(floors, floor)
+        below = floors[i - 1] if i > 0 else None
+        above = floors[i] if i < len(floors) else None
+        return below, above
+
+    def _floors(self, direction: Optional[int]) -> List[int]:
+        """Return the sorted floors where someone going in <direction> is
+        waiting, or anyone if <direction> is None, without copying them.
+        """
+        if direction is None:
+            return self._occupied
+        return self._calls[direction]
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['bisect', 'collections', 'heapq', 'entities']
+    })
@@ -0,0 +1,278 @@
+"""CSC148 Assignment 1 - Zoned Buildings
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module description ===
+This module contains what the simulation needs for buildings where each
+elevator only stops at some floors, set with config['served_floors'].
+
+Elevators that stop at exactly the same floors form a bank. A person whose
+start and target floors no bank serves together makes their trip in legs,
+getting off at a transfer floor (a sky lobby) and waiting there for the next
+bank. BuildingLayout works out every route once, when the simulation is
+created. ZonedQueues keeps separate waiting queues for each bank, and
+ZonedDispatch moves each bank with its own copy of a moving algorithm, which
+only sees that bank's elevators and the people waiting for it.
+"""
+import copy
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from algorithms import Direction, MovingAlgorithm
+from entities import HeadlessElevator, HeadlessPerson
+from waiting import WaitingQueues
+
+
+class BuildingLayout:
+    """The floors each elevator of a building serves, and the route between
+    every two floors.
+
+    === Attributes ===
+    num_floors: the number of floors
+    serves: whether each elevator stops at each floor; serves[i][floor] is
+            True if and only if the elevator at index i stops at <floor>
+    banks: the indices of the elevators in each bank, in increasing order;
+           banks are numbered in the order of their first elevator
+    bank_of: the bank of the elevator at each index
+
+    === Private Attributes ===
+    _bank_floors: the floors served by each bank, in increasing order
+    _routes: _routes[start][target] is the first leg of the route from
+             <start> to <target>, as the floor to get off at and the bank to
+             take there
+
+    === Representation invariants ===
+    Every floor is served by at least one bank.
+    The routes take as few legs as possible.
+    """
+    num_floors: int
+    serves: List[List[bool]]
+    banks: List[List[int]]
+    bank_of: List[int]
+    _bank_floors: List[List[int]]
+    _routes: List[List[Tuple[int, int]]]
+
+    def __init__(self, num_floors: int,
+                 served_floors: List[Iterable[int]]) -> None:
+        """Initialize the layout of a building with <num_floors> floors, in
+        which the elevator at index i stops at the floors in
+        served_floors[i], and work out its routes.
+
+        Raise ValueError if an elevator serves a floor outside the building,
+        or if some floor cannot be reached from another.
+
+        Precondition: num_floors >= 2 and len(served_floors) >= 1
+        """
+        self.num_floors = num_floors
+        self.serves = []
+        self.banks = []
+        self.bank_of = []
+        self._bank_floors = []
+        bank_numbers = {}
+        for index, floors in enumerate(served_floors):
+            floors = sorted(set(floors))
+            if floors and (floors[0] < 1 or floors[-1] > num_floors):
+                raise ValueError(f'elevator {index} serves a floor outside '
+                                 f'floors 1 to {num_floors}')
+            key = tuple(floors)
+            if key not in bank_numbers:
+                bank_numbers[key] = len(self.banks)
+                self.banks.append([])
+                self._bank_floors.append(floors)
+            bank = bank_numbers[key]
+            self.banks[bank].append(index)
+            self.bank_of.append(bank)
+            serves = [False] * (num_floors + 1)
+            for floor in floors:
+                serves[floor] = True
+            self.serves.append(serves)
+
+        banks_at = [[] for _ in range(num_floors + 1)]
+        for bank, floors in enumerate(self._bank_floors):
+            for floor in floors:
+                banks_at[floor].append(bank)
+        self._routes = [[(0, -1)] * (num_floors + 1)
+                        for _ in range(num_floors + 1)]
+        for target in range(1, num_floors + 1):
+            for start, leg in enumerate(self._routes_to(target, banks_at)):
+                self._routes[start][target] = leg
+
+    def route(self, start: int, target: int) -> Tuple[int, int]:
+        """Return the first leg of the route from <start> to <target>, as the
+        floor to get off at and the bank to take.
+
+        Precondition: start != target, and both are floors of the building.
+        """
+        return self._routes[start][target]
+
+    def served_range(self, index: int) -> Tuple[int, int]:
+        """Return the lowest and highest floors the elevator at <index>
+        serves, or floor 1 for both if it serves no floors.
+        """
+        floors = [floor for floor, served in enumerate(self.serves[index])
+                  if served] or [1]
+        return floors[0], floors[-1]
+
+    def _routes_to(self, target: int, banks_at: List[List[int]]
+                   ) -> List[Tuple[int, int]]:
+        """Return the first leg of the route from each floor to <target>, at
+        the index of that floor, with (0, -1) at index 0 and <target>.
+        <banks_at> holds the banks serving each floor, at its index.
+
+        Raise ValueError if <target> cannot be reached from some floor.
+        """
+        routes = [(0, -1)] * (self.num_floors + 1)
+        # A breadth-first search back from <target>. Each bank only needs to
+        # be taken from the first floor it reaches, and transfer floors close
+        # to <target> are tried first.
+        reached = [False] * (self.num_floors + 1)
+        reached[target] = True
+        taken = [False] * len(self._bank_floors)
+        floors = [target]
+        while floors:
+            next_floors = []
+            for floor in sorted(floors, key=lambda f: abs(f - target)):
+                for bank in banks_at[floor]:
+                    if taken[bank]:
+                        continue
+                    taken[bank] = True
+                    for start in self._bank_floors[bank]:
+                        if not reached[start]:
+                            reached[start] = True
+                            routes[start] = (floor, bank)
+                            next_floors.append(start)
+            floors = next_floors
+
+        if not all(reached[1:]):
+            start = reached.index(False, 1)
+            raise ValueError(f'floor {target} cannot be reached from floor '
+                             f'{start}')
+        return routes
+
+
+class ZonedQueues:
+    """The people waiting for an elevator in a zoned building, as separate
+    WaitingQueues for each bank.
+
+    People added to the queues are routed: their target becomes the floor to
+    get off at on the next leg of their trip, and they wait for the bank that
+    takes them there.
+
+    === Attributes ===
+    layout: the layout of the building
+    banks: the queues of the people waiting for each bank
+    """
+    layout: BuildingLayout
+    banks: List[WaitingQueues]
+
+    def __init__(self, layout: BuildingLayout) -> None:
+        """Initialize empty queues for every bank of <layout>."""
+        self.layout = layout
+        self.banks = [WaitingQueues(layout.num_floors)
+                      for _ in layout.banks]
+
+    def add(self, floor: int, people: Iterable[HeadlessPerson]) -> None:
+        """Route <people> from <floor> towards their final target, and add
+        them to the back of the queues of their banks, in order.
+        """
+        by_bank = {}
+        for person in people:
+            person.target, bank = self.layout.route(floor,
+                                                    person.final_target)
+            by_bank.setdefault(bank, []).append(person)
+        for bank, bank_people in by_bank.items():
+            self.banks[bank].add(floor, bank_people)
+
+    def items(self) -> Iterator[Tuple[int, List[HeadlessPerson]]]:
+        """Yield each floor with the people waiting there, bank by bank."""
+        for floor in range(1, self.layout.num_floors + 1):
+            people = []
+            for queues in self.banks:
+                people.extend(queues[floor])
+            yield floor, people
+
+
+class ZonedDispatch(MovingAlgorithm):
+    """Moves the elevators of each bank of a zoned building with its own
+    copy of a moving algorithm.
+
+    Each copy is only given the elevators of its bank and the people waiting
+    for that bank. An algorithm that moves elevators without looking at who
+    is waiting, like RandomAlgorithm, could still send them past the floors
+    their bank serves, so such moves are turned into staying still.
+
+    === Attributes ===
+    layout: the layout of the building
+    algorithms: the moving algorithm of each bank
+
+    === Private Attributes ===
+    _lowest: the lowest floor each elevator serves
+    _highest: the highest floor each elevator serves
+    """
+    layout: BuildingLayout
+    algorithms: List[MovingAlgorithm]
+    _lowest: List[int]
+    _highest: List[int]
+
+    def __init__(self, moving_algorithm: MovingAlgorithm,
+                 layout: BuildingLayout) -> None:
+        """Initialize a dispatch that moves each bank of <layout> with a copy
+        of <moving_algorithm>.
+        """
+        self.layout = layout
+        self.algorithms = [copy.deepcopy(moving_algorithm)
+                           for _ in layout.banks]
+        self._lowest = []
+        self._highest = []
+        for index in range(len(layout.serves)):
+            lowest, highest = layout.served_range(index)
+            self._lowest.append(lowest)
+            self._highest.append(highest)
+
+    def move_elevators(self,
+                       elevators: List[HeadlessElevator],
+                       waiting: Dict[int, List[HeadlessPerson]],
+                       max_floor: int) -> List[Direction]:
+        """Return a list of directions for each elevator to move to.
+
+        An elevator is never moved further above the highest floor, or below
+        the lowest floor, that it serves.
+
+        Precondition: <elevators> are all of the elevators of the building,
+        in order, and <waiting> is its ZonedQueues.
+        """
+        indices = [[] for _ in self.layout.banks]
+        for index in range(len(elevators)):
+            indices[self.layout.bank_of[index]].append(index)
+
+        direct_list = [Direction.STAY] * len(elevators)
+        for bank, bank_indices in enumerate(indices):
+            bank_directions = self.algorithms[bank].move_elevators(
+                [elevators[index] for index in bank_indices],
+                waiting.banks[bank], max_floor)
+            for index, direction in zip(bank_indices, bank_directions):
+                floor = elevators[index].current_floor
+                if ((direction == Direction.UP and
+                     floor >= self._highest[index]) or
+                        (direction == Direction.DOWN and
+                         floor <= self._lowest[index])):
+                    direction = Direction.STAY
+                direct_list[index] = direction
+        return direct_list
+
+    def get_state(self) -> List[Any]:
+        """Return the state of the algorithm of each bank."""
+        return [algorithm.get_state() for algorithm in self.algorithms]
+
+    def set_state(self, state: List[Any]) -> None:
+        """Restore the states returned by get_state."""
+        for algorithm, bank_state in zip(self.algorithms, state):
+            algorithm.set_state(bank_state)
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['copy', 'algorithms', 'entities', 'waiting']
+    })